@@ -1,68 +1,72 @@
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM, pipeline
-import json
+import os
+import sys
 
-# استخدام النموذج البديل لإعادة صياغة الأسئلة
-model_name = "salti/arabic-t5-small-question-paraphrasing"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from paraphrase_engine import generate_paraphrase_candidates
+from model_registry import get_pipeline
+from question_io import load_questions, write_questions
 
-try:
-    # تهيئة النموذج
-    print(f"⚙️ جاري تحميل النموذج {model_name}...")
-    tokenizer = AutoTokenizer.from_pretrained(model_name)
-    model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+# استخدام النموذج البديل لإعادة صياغة الأسئلة (بيتحمل أول مرة نحتاجه بس)
+model_name = "salti/arabic-t5-small-question-paraphrasing"
 
-    # استخدام GPU إذا متاح
-    
-    paraphraser = pipeline(
-        "text2text-generation", 
-        model=model, 
-        tokenizer=tokenizer
+def generate_paraphrases(questions, num_versions=2, batch_size=8):
+    """توليد إعادة صياغات لقائمة أسئلة على دفعات (كل سؤال له قائمة)"""
+    return generate_paraphrase_candidates(
+        get_pipeline("text2text-generation", model_name),
+        questions,
+        num_return_sequences=num_versions,
+        batch_size=batch_size,
+        prefix="",
+        max_new_tokens=80,
+        num_beams=5,
+        repetition_penalty=2.0,
+        temperature=0.7  # تنويع الإخراج
     )
 
-    print("✅ تم تحميل النموذج بنجاح!")
+def main():
+    try:
+        # تهيئة النموذج
+        get_pipeline("text2text-generation", model_name)
 
-    def generate_paraphrases(question, num_versions=2):
-        """توليد إعادة صياغات للسؤال مع الحفاظ على الأصل"""
-        paraphrases = paraphraser(
-            question,
-            max_new_tokens=80,
-            num_return_sequences=num_versions,
-            num_beams=5,
-            repetition_penalty=2.0,
-            temperature=0.7  # تنويع الإخراج
-        )
-        return [p['generated_text'] for p in paraphrases]
+        print("✅ تم تحميل النموذج بنجاح!")
 
-    # معالجة الملف
-    input_file = "D:\\company\\arabic_questions.json"
-    print(f"📂 جاري قراءة الملف: {input_file}")
-    with open(input_file, 'r', encoding='utf-8') as f:
-        questions = json.load(f)
+        # معالجة الملف
+        input_file = "D:\\company\\arabic_questions.json"
+        print(f"📂 جاري قراءة الملف: {input_file}")
+        questions = load_questions(input_file)
 
-    print(f"🔁 بدء معالجة {len(questions)} سؤال...")
+        print(f"🔁 بدء معالجة {len(questions)} سؤال...")
 
-    for i, item in enumerate(questions, 1):
-        original = item.get('question_ar') or item.get('السؤال')  # دعم المفتاحين
+        # load_questions بيوحد المفاتيح (السؤال / question_ar → question)
+        originals = [item['question'] for item in questions]
         try:
-            versions = [original] + generate_paraphrases(original, num_versions=2)
-            item['versions_ar'] = versions
-            print(f"[{i}/{len(questions)}] ✓ تمت إعادة صياغة: {original}")
+            all_paraphrases = generate_paraphrases(originals, num_versions=2)
         except Exception as e:
-            print(f"[{i}/{len(questions)}] ✗ خطأ في: {original} - {str(e)}")
-            item['versions_ar'] = [original]
+            print(f"✗ خطأ في إعادة الصياغة المجمعة: {str(e)}")
+            all_paraphrases = [[] for _ in originals]
+
+        for i, (item, original, paraphrases) in enumerate(zip(questions, originals, all_paraphrases), 1):
+            item['versions_ar'] = [original] + paraphrases
+            if paraphrases:
+                print(f"[{i}/{len(questions)}] ✓ تمت إعادة صياغة: {original}")
+            else:
+                print(f"[{i}/{len(questions)}] ✗ خطأ في: {original}")
+
+        # حفظ النتائج
+        output_file = 'enhanced_questions1.json'
+        write_questions(questions, output_file)
 
-    # حفظ النتائج
-    output_file = 'enhanced_questions1.json'
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(questions, f, ensure_ascii=False, indent=2)
+        print(f"💾 تم الانتهاء! النتائج محفوظة في {output_file}")
+        print(f"• عدد الأسئلة المعالجة: {len(questions)}")
+        print(f"• إجمالي النسخ المتاحة: {sum(len(item['versions_ar']) for item in questions)}")
 
-    print(f"💾 تم الانتهاء! النتائج محفوظة في {output_file}")
-    print(f"• عدد الأسئلة المعالجة: {len(questions)}")
-    print(f"• إجمالي النسخ المتاحة: {sum(len(item['versions_ar']) for item in questions)}")
+    except Exception as e:
+        print(f"❌ حدث خطأ جسيم: {str(e)}")
+        print("الحلول المقترحة:")
+        print("1. تأكد من اتصالك بالإنترنت")
+        print("2. قم بتحديث المكتبات: pip install --upgrade transformers torch")
+        print("3. جرب استخدام GPU إذا كان متاحًا")
+        print("4. تحقق من صحة مسار الملفات")
 
-except Exception as e:
-    print(f"❌ حدث خطأ جسيم: {str(e)}")
-    print("الحلول المقترحة:")
-    print("1. تأكد من اتصالك بالإنترنت")
-    print("2. قم بتحديث المكتبات: pip install --upgrade transformers torch")
-    print("3. جرب استخدام GPU إذا كان متاحًا")
-    print("4. تحقق من صحة مسار الملفات")
+if __name__ == "__main__":
+    main()
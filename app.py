@@ -1,5 +1,5 @@
-import json
-from googletrans import Translator
+from translation_executor import TranslationExecutor, GoogletransBackend
+from question_io import write_questions
 original_questions = [
     {
         "question": "لf Ahmed has 3 balls and gives 2 to Mohamed, how many does he have left؟",
@@ -29,9 +29,10 @@ original_questions = [
 ]
 
 # دالة للترجمة
+translator = TranslationExecutor(GoogletransBackend())
+
 def translate_text(text, src='ar', dest='en'):
-    translator = Translator()
-    return translator.translate(text, src=src, dest=dest).text
+    return translator.translate(text, src=src, tgt=dest)
 
 # دالة لإعادة الصياغة باستخدام نموذج بديل (افتراضي)
 def manual_paraphrase_ar(question):
@@ -77,5 +78,4 @@ def generate_alt_versions(questions):
 questions_with_alts = generate_alt_versions(original_questions)
 
 # حفظ النتائج في ملف
-with open('questions_versions.json', 'w', encoding='utf-8') as f:
-    json.dump(questions_with_alts, f, ensure_ascii=False, indent=4)
\ No newline at end of file
+write_questions(questions_with_alts, 'questions_versions.json')
\ No newline at end of file
@@ -0,0 +1,68 @@
+import re
+
+# محرك استبدال بيطبق جدول قواعد كامل في لفة واحدة على النص.
+# القواعد بتتحول لـ regex واحد على شكل trie، فتكلفة كل حرف في النص بتعتمد
+# على طول أطول قاعدة مش على عدد القواعد، والأطول بيكسب في نفس المكان.
+# الناتج بتاع قاعدة مش بيتعرض لقاعدة تانية (مثلاً "أي" → "إيه" ثم "ه" → "هـ").
+
+
+def _trie_pattern(words):
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node):
+        alternatives = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not alternatives:
+            return ""
+        body = alternatives[0] if len(alternatives) == 1 else "(?:" + "|".join(alternatives) + ")"
+        # لو فيه كلمة بتخلص هنا الباقي اختياري، والـ regex بيجرب الأطول الأول
+        return "(?:" + body + ")?" if "" in node else body
+
+    return build(trie)
+
+
+class RewriteEngine:
+    """rules: dict من الكلمة للبديل. whole_word: القواعد اللي تتطبق على كلمة كاملة بس."""
+
+    SEPARATOR = "\x00"
+
+    def __init__(self, rules, whole_word=()):
+        self.rules = {k: v for k, v in rules.items() if k and k != v}
+        self.whole_word = set(whole_word)
+        word_keys = [k for k in self.rules if k in self.whole_word]
+        sub_keys = [k for k in self.rules if k not in self.whole_word]
+
+        parts = []
+        # قواعد الكلمة الكاملة ليها الأولوية في نفس المكان
+        if word_keys:
+            parts.append(r"(?<!\w)(?:" + _trie_pattern(word_keys) + r")(?!\w)")
+        if sub_keys:
+            parts.append("(?:" + _trie_pattern(sub_keys) + ")")
+        self.pattern = re.compile("|".join(parts)) if parts else None
+
+    def _replace(self, match):
+        return self.rules[match.group(0)]
+
+    def apply(self, text):
+        if self.pattern is None or not text:
+            return text
+        return self.pattern.sub(self._replace, text)
+
+    def apply_batch(self, texts):
+        """تطبيق القواعد على قائمة نصوص في استدعاء sub واحد."""
+        texts = list(texts)
+        if self.pattern is None or not texts:
+            return texts
+        if any(self.SEPARATOR in t for t in texts):
+            return [self.apply(t) for t in texts]
+        return self.apply(self.SEPARATOR.join(texts)).split(self.SEPARATOR)
+
+    def extend(self, rules, whole_word=()):
+        """محرك جديد فيه القواعد القديمة والجديدة مع بعض."""
+        merged = dict(self.rules)
+        merged.update(rules)
+        return RewriteEngine(merged, self.whole_word | set(whole_word))
@@ -1,12 +1,12 @@
 # child_attention_versions.py
-from transformers import pipeline
-import json
+from paraphrase_engine import generate_paraphrase_candidates
+from question_io import write_questions
+from model_registry import get_pipeline
 
 # ---------- LOAD PARAPHRASER MODEL ----------
+# the model is loaded lazily (first call) and shared through the registry
 def load_paraphraser():
-    return pipeline("text2text-generation", model="salti/arabic-t5-small-question-paraphrasing") #Vamsi/T5_Paraphrase_Paws
-
-paraphraser = load_paraphraser()
+    return get_pipeline("text2text-generation", "salti/arabic-t5-small-question-paraphrasing") #Vamsi/T5_Paraphrase_Paws
 
 # ---------- ATTENTION QUESTIONS (with logical thinking) ----------
 original_questions = [
@@ -39,31 +39,35 @@ original_questions = [
 ]
 
 # ---------- GENERATE MULTIPLE VERSIONS PER QUESTION ----------
-def generate_multi_versions(questions, num_versions=3):
+def generate_multi_versions(questions, num_versions=3, batch_size=8):
+    # Generate paraphrased versions for all questions in padded batches
+    generated = generate_paraphrase_candidates(
+        load_paraphraser(),
+        [q["question"] for q in questions],
+        num_return_sequences=num_versions - 1,
+        batch_size=batch_size,
+        num_beams=5,
+        max_length=60
+    )
+
     extended_questions = []
-    for q in questions:
-        versions = []
+    for q, alts in zip(questions, generated):
         # Add original question
-        versions.append(q["question"])
-
-        # Generate paraphrased versions
-        generated = paraphraser("paraphrase: " + q["question"], max_length=60, num_return_sequences=num_versions - 1)
-        for alt in generated:
-            versions.append(alt['generated_text'])
+        versions = [q["question"]] + alts
 
         q_copy = q.copy()
         q_copy["versions"] = versions
         extended_questions.append(q_copy)
     return extended_questions
 
-questions_with_versions = generate_multi_versions(original_questions, num_versions=3)
+if __name__ == "__main__":
+    questions_with_versions = generate_multi_versions(original_questions, num_versions=3)
 
-# ---------- SAVE TO JSON WITH UTF-8 ENCODING ----------
-with open("questions_with_versions.json", "w", encoding="utf-8") as f:
-    json.dump(questions_with_versions, f, ensure_ascii=False, indent=2)
+    # ---------- SAVE TO JSON WITH UTF-8 ENCODING ----------
+    write_questions(questions_with_versions, "questions_with_versions.json")
 
-# ---------- DEBUG OUTPUT ----------
-for i, q in enumerate(questions_with_versions):
-    print(f"\nQuestoin {i+1}:")
-    for v_idx, version in enumerate(q["versions"], start=1):
-        print(f"  نسخة {v_idx}: {version}")
+    # ---------- DEBUG OUTPUT ----------
+    for i, q in enumerate(questions_with_versions):
+        print(f"\nQuestoin {i+1}:")
+        for v_idx, version in enumerate(q["versions"], start=1):
+            print(f"  نسخة {v_idx}: {version}")
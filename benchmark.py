@@ -0,0 +1,244 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# قياس سرعة وذاكرة مراحل التحسين من غير نت ولا موديلات حقيقية:
+# الموديلات بتتبدل بـ stubs صغيرة من خلال model_registry.register_loader،
+# والمترجم بـ StubBackend. كل (مرحلة، حجم) بتشتغل في process لوحدها عشان
+# الـ peak RSS يبقى بتاعها هي بس.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PARAPHRASER_NAME = "humarin/chatgpt_paraphraser_on_T5_base"
+NLLB_NAME = "facebook/nllb-200-distilled-600M"
+STAGES = ("paraphrase_question", "context_aware_translate", "simplify_for_children", "enhance_question_quality")
+
+
+# ---------- STUB MODELS ----------
+class StubTokenizer:
+    """نفس الجزء اللي بنستخدمه من HF tokenizer: النص نفسه هو الـ "token"."""
+
+    def __init__(self):
+        self.lang_code_to_id = {"arb_Arab": 0}
+        self.src_lang = None
+
+    def __call__(self, texts, return_tensors=None, padding=False, truncation=False):
+        if isinstance(texts, str):
+            return {"input_ids": texts.split()}
+        return {"input_ids": [[t] for t in texts]}
+
+    def batch_decode(self, sequences, skip_special_tokens=True):
+        return [self.decode(s) for s in sequences]
+
+    def decode(self, sequence):
+        return sequence[0]
+
+
+class StubParaphraseTokenizer(StubTokenizer):
+
+    def decode(self, sequence):
+        text = sequence[0].replace("paraphrase: ", "").rstrip("?")
+        return f"Can you tell me {text} (version {sequence[1]})?"
+
+
+class StubTranslationTokenizer(StubTokenizer):
+
+    def decode(self, sequence):
+        return "ترجمة " + sequence[0]
+
+
+class StubModel:
+    """generate بيرجع num_return_sequences نسخة لكل دخل، مع تأخير ثابت لكل استدعاء."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+
+    def generate(self, input_ids=None, num_return_sequences=1, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        return [ids + [k] for ids in input_ids for k in range(num_return_sequences)]
+
+
+def install_stubs(latency):
+    import model_registry
+    model_registry.register_loader(PARAPHRASER_NAME, lambda: (StubParaphraseTokenizer(), StubModel(latency)))
+    model_registry.register_loader(NLLB_NAME, lambda: (StubTranslationTokenizer(), StubModel(latency)))
+
+
+def peak_rss_mb():
+    try:
+        import resource
+        # ru_maxrss بالكيلوبايت على لينكس
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:
+        # ويندوز: resource مش موجودة
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / (1024 * 1024)
+
+
+# ---------- DATA ----------
+def make_bank(size, path):
+    """بنك صناعي بحجم size مبني من En_questions.json، وكل سؤال مختلف عشان الكاش مايغشش."""
+    with open(os.path.join(HERE, "En_questions.json"), encoding="utf-8") as f:
+        base = json.load(f)
+    if not size:
+        bank = base
+    else:
+        bank = []
+        for i in range(size):
+            q = dict(base[i % len(base)])
+            q["question"] = f"{q['question'].rstrip('?')} #{i}?"
+            bank.append(q)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(bank, f, ensure_ascii=False)
+    return bank
+
+
+# ---------- STAGES ----------
+def _timed(fn, items):
+    latencies = []
+    for item in items:
+        started = time.perf_counter()
+        fn(item)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def run_stage(stage, size, latency, pipelined=False):
+    workdir = tempfile.mkdtemp(prefix="quiz_bench_")
+    # كاش ترجمة فاضي لكل تشغيل
+    os.environ["TRANSLATION_CACHE_PATH"] = os.path.join(workdir, "cache.sqlite3")
+    os.environ["TRANSLATION_BACKEND"] = "stub"
+    # ترتيب الصياغات من غير تحميل موديل embeddings من الـ Hub
+    os.environ["QUIZ_EMBEDDER"] = "hashing"
+    sys.path.insert(0, HERE)
+    install_stubs(latency)
+    import update_model
+
+    input_file = os.path.join(workdir, "questions.json")
+    bank = make_bank(size, input_file)
+
+    started = time.perf_counter()
+    if stage == "paraphrase_question":
+        paraphraser = update_model.get_paraphraser()
+        latencies = _timed(lambda q: update_model.paraphrase_question(paraphraser, q["question"]), bank)
+    elif stage == "context_aware_translate":
+        texts = [t for q in bank for t in [q["question"]] + q["choices"]]
+        latencies = _timed(update_model.context_aware_translate, texts)
+    elif stage == "simplify_for_children":
+        texts = [f"ما هو الحرف الذي يأتي بعد الطفلة في تلك الجملة {i}؟" for i in range(len(bank))]
+        latencies = _timed(update_model.simplify_for_children, texts)
+    else:
+        # زمن كل سؤال = زمن الدفعة بتاعته (من أول مرحلة لآخر مرحلة) على عدد أسئلتها
+        latencies = []
+        batch_started = {}
+        paraphrase_stage, simplify_stage = update_model.paraphrase_stage, update_model.simplify_stage
+
+        def timed_paraphrase(items, *args, **kwargs):
+            batch_started[id(items)] = time.perf_counter()
+            return paraphrase_stage(items, *args, **kwargs)
+
+        def timed_simplify(items):
+            result = simplify_stage(items)
+            elapsed = time.perf_counter() - batch_started.pop(id(items))
+            latencies.extend([elapsed / len(items)] * len(items))
+            return result
+
+        update_model.paraphrase_stage, update_model.simplify_stage = timed_paraphrase, timed_simplify
+        sys.stdout, stdout = open(os.devnull, "w"), sys.stdout
+        try:
+            update_model.enhance_question_quality(input_file, os.path.join(workdir, "out.json"),
+                                                  pipelined=pipelined)
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+    seconds = time.perf_counter() - started
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    latencies.sort()
+    return {
+        "stage": stage,
+        "size": len(bank),
+        "items": len(latencies),
+        "seconds": round(seconds, 4),
+        "throughput_per_s": round(len(latencies) / seconds, 2) if seconds else None,
+        "p50_ms": round(statistics.median(latencies) * 1000, 4) if latencies else None,
+        "p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))] * 1000, 4) if latencies else None,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(previous_file, results):
+    with open(previous_file, encoding="utf-8") as f:
+        previous = {(r["stage"], r["size"]): r for r in json.load(f)["results"]}
+    print(f"\n📊 مقارنة مع {previous_file}:")
+    for r in results:
+        old = previous.get((r["stage"], r["size"]))
+        if old and old["throughput_per_s"] and r["throughput_per_s"]:
+            change = (r["throughput_per_s"] / old["throughput_per_s"] - 1) * 100
+            print(f"  {r['stage']:<26} {r['size']:>7}  throughput {change:+.1f}%  "
+                  f"p95 {old['p95_ms']:.3f} → {r['p95_ms']:.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="benchmark لمراحل تحسين الأسئلة بموديلات stub")
+    parser.add_argument("--stages", default=",".join(STAGES))
+    parser.add_argument("--sizes", default="0,1000,10000,100000",
+                        help="أحجام البنوك الصناعية (0 = En_questions.json زي ما هو)")
+    parser.add_argument("--stub-latency-ms", type=float, default=0.0,
+                        help="تأخير ثابت لكل استدعاء generate في الـ stub")
+    parser.add_argument("--pipelined", action="store_true",
+                        help="enhance_question_quality بالمراحل المتداخلة")
+    parser.add_argument("-o", "--output", default="benchmark_results.json")
+    parser.add_argument("--compare", help="ملف نتائج قديم للمقارنة")
+    parser.add_argument("--run-stage", help=argparse.SUPPRESS)
+    parser.add_argument("--size", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_stage:
+        print(json.dumps(run_stage(args.run_stage, args.size, args.stub_latency_ms / 1000, args.pipelined)))
+        return
+
+    results = []
+    for size in [int(s) for s in args.sizes.split(",")]:
+        for stage in args.stages.split(","):
+            output = subprocess.check_output([
+                sys.executable, os.path.abspath(__file__), "--run-stage", stage, "--size", str(size),
+                "--stub-latency-ms", str(args.stub_latency_ms)
+            ] + (["--pipelined"] if args.pipelined else []), text=True)
+            result = json.loads(output.strip().splitlines()[-1])
+            results.append(result)
+            print(f"⏱️ {stage:<26} {result['size']:>7} سؤال  {result['throughput_per_s']:>10}/s  "
+                  f"p50 {result['p50_ms']:.3f} ms  p95 {result['p95_ms']:.3f} ms  RSS {result['peak_rss_mb']} MB")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "stub_latency_ms": args.stub_latency_ms,
+            "pipelined": args.pipelined,
+            "results": results,
+        }, f, ensure_ascii=False, indent=2)
+    print(f"💾 تم حفظ النتائج في {args.output}")
+
+    if args.compare:
+        compare(args.compare, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,13 @@
 # child_quiz_app_deploy.py
 import streamlit as st
-import json
-import random
+import os
+import uuid
 from PIL import Image
+from question_bank import load_bank
+from quiz_service import QuizServiceClient
+from quiz_session import QuizPools, QuizSession
+from results_store import ResultsStore
+from validate_bank import answer_index
 
 # ---------- CONFIG ----------
 st.set_page_config(page_title="اختبار الانتباه للأطفال", layout="centered")
@@ -20,94 +25,134 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # ---------- HEADER IMAGE ----------
-image = Image.open("child_avatar.jpg")  # ضع صورة باسم child_avatar.jpg في نفس المجلد
+@st.cache_resource
+def load_header_image():
+    return Image.open("child_avatar.jpg")  # ضع صورة باسم child_avatar.jpg في نفس المجلد
+
+image = load_header_image()
 st.image(image, caption=" اختبار الانتباه للأطفال", use_container_width=True)
 
 # ---------- LOAD QUESTIONS ----------
-@st.cache_data
-def load_questions():
-    with open("enhanced_questions.json", "r", encoding="utf-8") as f:
-        return json.load(f)
-
-all_questions = load_questions()
-
-# فلترة الأسئلة الخاصة بالفهم والاتجاه
-comprehension_questions = [q for q in all_questions if q.get("category_ar") == "فهـم"]
-direction_questions = [q for q in all_questions if q.get("category_ar") == "الاتجاهـ"]
-
-# اختيار 10 من كل فئة بشكل عشوائي
-selected_comprehension = random.sample(comprehension_questions, min(10, len(comprehension_questions)))
-selected_direction = random.sample(direction_questions, min(10, len(direction_questions)))
-selected_questions = selected_comprehension + selected_direction
-random.shuffle(selected_questions)
+SOURCE_BANK = "enhanced_questions.json"
+VALIDATED_BANK = "enhanced_questions.validated.json"
+STORE_BANK = "enhanced_questions.qstore"
+
+def is_fresh(derived, sources):
+    """الملف المتبني (qstore / validated) بيتستخدم بس لو مش أقدم من الملفات اللي اتبنى منها،
+    عشان بعد توليد البنك من جديد مانفضلش نعرض النسخة القديمة."""
+    if not os.path.exists(derived):
+        return False
+    newer = [s for s in sources if os.path.exists(s) and os.path.getmtime(s) > os.path.getmtime(derived)]
+    if newer:
+        print(f"⚠️ {derived} أقدم من {', '.join(newer)} ومش هيتستخدم (ابنيه تاني)")
+    return not newer
+
+# cache_resource بيرجع نفس البنك لكل الجلسات من غير نسخ، والفهارس بتتبني مرة واحدة
+@st.cache_resource
+def load_question_bank():
+    # لو خدمة الأسئلة شغالة (python quiz_service.py) بنقرا منها، ولو مش متاحة بنرجع للملفات
+    service_url = os.environ.get("QUIZ_SERVICE_URL")
+    if service_url:
+        try:
+            return QuizServiceClient(service_url)
+        except OSError as e:
+            print(f"⚠️ خدمة الأسئلة مش متاحة ({e})، هنستخدم الملف المحلي")
+    # لو المخزن المضغوط متبني (python question_store.py build enhanced_questions.json) بنستخدمه
+    if is_fresh(STORE_BANK, [SOURCE_BANK, VALIDATED_BANK]):
+        return load_bank(STORE_BANK)
+    # البنك بعد الفحص وتحديد answer_index (python validate_bank.py enhanced_questions.json)
+    if is_fresh(VALIDATED_BANK, [SOURCE_BANK]):
+        return load_bank(VALIDATED_BANK)
+    return load_bank(SOURCE_BANK)
+
+bank = load_question_bank()
+
+# السلال (الفئة × المستوى) بتتبني مرة واحدة وكل الجلسات بتسحب منها
+@st.cache_resource
+def load_quiz_pools():
+    return QuizPools(bank)
+
+pools = load_quiz_pools()
+
+# كل الجلسات بتسجل إجاباتها في نفس المخزن (buffer في الذاكرة والكتابة على القرص في الخلفية)
+@st.cache_resource
+def load_results_store():
+    return ResultsStore()
+
+results = load_results_store()
+
+# 10 من كل فئة (الفهم والاتجاه)، والمستوى بيتغير حسب إجابات الطفل
+QUOTAS = {"فهـم": 10, "الاتجاهـ": 10}
 
 # ---------- SESSION STATE ----------
-if "index" not in st.session_state:
-    st.session_state.index = 0
-    st.session_state.score = 0
-    st.session_state.finished = False
-    st.session_state.try_again = False
-    st.session_state.questions = selected_questions
+if "quiz" not in st.session_state:
+    st.session_state.quiz = QuizSession(pools, QUOTAS)
+    st.session_state.session_id = uuid.uuid4().hex
 
-# ---------- MAIN QUIZ ----------
-if not st.session_state.finished:
-    q = st.session_state.questions[st.session_state.index]
-    current_q_text = q['versions_ar'][1] if st.session_state.try_again and len(q['versions_ar']) > 1 else q['versions_ar'][0]
-
-    st.markdown(f"<div class='question'>سؤال {st.session_state.index + 1}: {current_q_text}</div>", unsafe_allow_html=True)
+quiz = st.session_state.quiz
 
+# ---------- MAIN QUIZ ----------
+# سؤال اتشال من البنك (404 من الخدمة) بيتخطى، والخدمة لو وقعت في النص بنوقف الـ rerun ده بس
+while not quiz.finished:
+    try:
+        q = bank.get(quiz.current)
+        break
+    except KeyError:
+        quiz.skip()
+    except OSError as e:
+        st.error(f"⚠️ خدمة الأسئلة مش متاحة دلوقتي ({e})، حاول تاني بعد شوية")
+        st.stop()
+
+if not quiz.finished:
+    current_q_text = quiz.question_text(q)
+
+    st.markdown(f"<div class='question'>سؤال {quiz.index + 1}: {current_q_text}</div>", unsafe_allow_html=True)
+
+    # رقم الإجابة الصحيحة محسوب وقت البناء (python validate_bank.py) فالمقارنة بالأرقام مش بالنص
+    correct_idx = answer_index(q)
     for idx, choice in enumerate(q['choices_ar']):
-        key = f"btn-{st.session_state.index}-{idx}"
+        key = f"btn-{quiz.index}-{idx}"
         if st.button(f"{chr(65+idx)}) {choice}", key=key):
-            if choice == q['answer_ar']:
+            correct = idx == correct_idx
+            results.record(st.session_state.session_id, quiz.current, q['category_ar'],
+                           quiz.version(q), correct, quiz.elapsed())
+            if quiz.answer(correct):
                 st.success(" إجابة صحيحة!")
-                st.session_state.score += 1
             else:
-                st.error(f" خطأ! الإجابة الصحيحة: {q['answer_ar']}")
-            st.session_state.index += 1
-            if st.session_state.index >= len(st.session_state.questions):
-                st.session_state.finished = True
+                correct_text = q['choices_ar'][correct_idx] if correct_idx is not None else q['answer_ar']
+                st.error(f" خطأ! الإجابة الصحيحة: {correct_text}")
             st.rerun()
 
 # ---------- RESULTS ----------
-if st.session_state.finished:
+if quiz.finished:
     st.markdown("---")
     st.subheader(" النتيجة النهائية")
-    st.write(f"الدرجة: {st.session_state.score} من {len(st.session_state.questions)}")
+    st.write(f"الدرجة: {quiz.score} من {quiz.total}")
 
-    if st.session_state.score == len(st.session_state.questions):
+    if not quiz.total:
+        # البنك مفيهوش أسئلة للفئات اللي في QUOTAS (مثلاً category_ar اتكتبت بشكل تاني)
+        st.warning("⚠️ مفيش أسئلة للفئات دي في البنك")
+    elif quiz.score == quiz.total:
         st.success(" ممتاز! تركيزك عالي جدًا.")
-    elif st.session_state.score >= len(st.session_state.questions) * 0.6:
+    elif quiz.score >= quiz.total * 0.6:
         st.info(" جيد! بس محتاج شوية تركيز.")
     else:
         st.warning(" محتاج تدريب أكتر على الانتباه.")
         st.info("📘 تم تجهيز نسخة من الأسئلة بصياغة مختلفة لك")
 
     if st.button(" حاول تاني بصياغة مختلفة"):
-        st.session_state.index = 0
-        st.session_state.score = 0
-        st.session_state.finished = False
-        st.session_state.try_again = True
-        st.session_state.questions = selected_questions
+        quiz.retry()
         st.rerun()
 
     st.download_button(
         label=" تحميل النتيجة",
-        data=f"نتيجتك: {st.session_state.score} من {len(st.session_state.questions)}",
+        data=f"نتيجتك: {quiz.score} من {quiz.total}",
         file_name="attention_score.txt",
         mime="text/plain"
     )
 
     if st.button(" إعادة الاختبار من الأول"):
-        selected_comprehension = random.sample(comprehension_questions, min(10, len(comprehension_questions)))
-        selected_direction = random.sample(direction_questions, min(10, len(direction_questions)))
-        selected_questions = selected_comprehension + selected_direction
-        random.shuffle(selected_questions)
-        st.session_state.index = 0
-        st.session_state.score = 0
-        st.session_state.finished = False
-        st.session_state.try_again = False
-        st.session_state.questions = selected_questions
+        quiz.reset()
         st.rerun()
 
 # ---------- IGNORE UNUSED MODEL IMPORT ----------
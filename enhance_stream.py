@@ -0,0 +1,369 @@
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import queue
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from incremental import load_previous_output, question_fingerprint
+from question_io import dumps, loads, normalize_question, write_questions
+from instrumentation import metrics
+
+# تشغيل التحسين كـ stream: الأسئلة بتتقري واحد واحد، وكل سؤال بيخلص بيتكتب
+# فوراً في ملف checkpoint (JSONL)، ولو حصل crash نكمل من آخر سؤال خلص
+
+
+def iter_questions(input_file, chunk_size=1 << 16, normalize=True):
+    """يقرا الأسئلة من ملف JSON (array) أو JSONL من غير ما يحمل الملف كله في الذاكرة.
+
+    الأسئلة بتتوحد بـ question_io.normalize_question (أي صيغة → نفس المفاتيح) إلا لو normalize=False.
+    """
+    for item in _iter_raw(input_file, chunk_size):
+        yield normalize_question(item) if normalize else item
+
+
+def _iter_raw(input_file, chunk_size):
+    if input_file.endswith(".jsonl"):
+        with open(input_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield loads(line)
+        return
+
+    decoder = json.JSONDecoder()
+    with open(input_file, 'r', encoding='utf-8') as f:
+        buf, pos, eof = "", 0, False
+        while True:
+            while pos < len(buf) and buf[pos] in "\ufeff \t\r\n,[":
+                pos += 1
+            if pos < len(buf) and buf[pos] == "]":
+                return
+            if pos >= len(buf):
+                if eof:
+                    return
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buf, pos = buf[pos:] + chunk, 0
+                continue
+            try:
+                item, pos = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # العنصر لسه ما اكتملش في الـ buffer
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buf, pos = buf[pos:] + chunk, 0
+                continue
+            yield item
+
+
+def question_id(item, index):
+    return item.get("id", index)
+
+
+class Checkpoint:
+    """ملف JSONL فيه سطر لكل سؤال خلص: {"id": ..., "item": {...}}."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def completed_ids(self):
+        if not os.path.exists(self.path):
+            return set()
+        done = set()
+        good_end = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                try:
+                    done.add(loads(line)["id"])
+                except (ValueError, KeyError):
+                    # سطر ناقص من crash في نص الكتابة
+                    break
+                good_end += len(line)
+        if good_end < os.path.getsize(self.path):
+            with open(self.path, 'r+b') as f:
+                f.truncate(good_end)
+        return done
+
+    def append(self, records):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for qid, item in records:
+                f.write(dumps({"id": qid, "item": item}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def iter_items(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield loads(line)["item"]
+
+    def compact(self, output_file):
+        """يحول الـ checkpoint لنفس صيغة الـ JSON array اللي deploy.py بيقراها."""
+        write_questions(self.iter_items(), output_file)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+_STOP = object()
+
+
+class _Aborted(Exception):
+    pass
+
+
+def run_pipeline(batches, stages, queue_size=2):
+    """يشغل كل batch على المراحل بالترتيب، وكل مرحلة في threads بتاعتها وبينهم طوابير محدودة.
+
+    stages: [(الاسم، fn(items) -> items، عدد الـ workers)]. الـ batches بتتقري في thread لوحدها،
+    والنتايج بترجع (batch، items) بنفس ترتيب الدخل. الطوابير المحدودة هي الـ backpressure:
+    لو مرحلة أبطأ من اللي قبلها، اللي قبلها بتستنى بدل ما تملى الذاكرة.
+    """
+    queues = [queue.Queue(queue_size) for _ in range(len(stages) + 1)]
+    abort = threading.Event()
+    errors = []
+
+    def put(q, value):
+        while True:
+            if abort.is_set():
+                raise _Aborted()
+            try:
+                q.put(value, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def get(q):
+        while True:
+            if abort.is_set():
+                raise _Aborted()
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+    def fail(e):
+        errors.append(e)
+        abort.set()
+
+    def feed():
+        try:
+            for seq, (batch, items) in enumerate(batches):
+                put(queues[0], (seq, batch, items))
+            for _ in range(stages[0][2]):
+                put(queues[0], _STOP)
+        except _Aborted:
+            pass
+        except Exception as e:
+            fail(e)
+
+    def work(n, fn, remaining):
+        inbox, outbox = queues[n], queues[n + 1]
+        try:
+            while True:
+                task = get(inbox)
+                if task is _STOP:
+                    break
+                seq, batch, items = task
+                put(outbox, (seq, batch, fn(items) if items else items))
+            # آخر worker يخلص في المرحلة يبلغ المرحلة اللي بعدها
+            with remaining[1]:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                for _ in range(stages[n + 1][2] if n + 1 < len(stages) else 1):
+                    put(outbox, _STOP)
+        except _Aborted:
+            pass
+        except Exception as e:
+            fail(e)
+
+    threads = [threading.Thread(target=feed, daemon=True)]
+    for n, (_, fn, workers) in enumerate(stages):
+        remaining = [workers, threading.Lock()]
+        threads += [threading.Thread(target=work, args=(n, fn, remaining), daemon=True) for _ in range(workers)]
+    for t in threads:
+        t.start()
+
+    # مراحل فيها أكتر من worker ممكن تخلص بترتيب مختلف فبنرتب هنا
+    finished, next_seq = {}, 0
+    try:
+        while True:
+            try:
+                task = get(queues[-1])
+            except _Aborted:
+                break
+            if task is _STOP:
+                break
+            seq, batch, items = task
+            finished[seq] = (batch, items)
+            while next_seq in finished:
+                yield finished.pop(next_seq)
+                next_seq += 1
+    finally:
+        abort.set()
+        for t in threads:
+            t.join()
+    if errors:
+        raise errors[0]
+
+
+def run_enhancement(input_file, output_file, enhance_batch=None, chunk_size=64,
+                    checkpoint_file=None, incremental=False, stages=None, pipelined=False,
+                    queue_size=2, index_range=None, previous_file=None):
+    """يشغل enhance_batch على الأسئلة على دفعات بحجم chunk_size ويكتب كل دفعة في الـ checkpoint.
+
+    enhance_batch بتاخد قائمة أسئلة وترجعها متحسنة بنفس الترتيب. بدلها ممكن نبعت stages
+    (نفس صيغة run_pipeline)؛ مع pipelined=True المراحل بتشتغل مع بعض على دفعات مختلفة
+    فالوقت الكلي بيقرب من وقت أبطأ مرحلة بدل مجموعهم.
+
+    index_range=(start, stop) بيشتغل على جزء من الأسئلة بس (بترتيبها في الملف)، و previous_file
+    الناتج القديم لوضع التحديث لو مش هو output_file (زي الـ shards).
+    """
+    stages = stages or [("enhance", enhance_batch, 1)]
+    checkpoint = Checkpoint(checkpoint_file or output_file + ".partial.jsonl")
+    done = checkpoint.completed_ids()
+    if done:
+        print(f"⏯️ استكمال من checkpoint: {len(done)} سؤال خلص قبل كده")
+
+    # في وضع التحديث الأسئلة اللي ما اتغيرتش بتتنقل زي ما هي من الناتج القديم
+    with metrics.stage("io"):
+        previous = load_previous_output(previous_file or output_file) if incremental else {}
+    counts = {"reused": 0, "recomputed": 0}
+
+    def windows():
+        window = []
+        pending = []
+        for index, item in enumerate(iter_questions(input_file)):
+            if index_range and index < index_range[0]:
+                continue
+            if index_range and index >= index_range[1]:
+                break
+            qid = question_id(item, index)
+            if qid in done:
+                continue
+            ready = previous.get(question_fingerprint(item)) if previous else None
+            if ready is not None:
+                counts["reused"] += 1
+            else:
+                pending.append(item)
+            window.append((qid, ready))
+            # الحد التاني بيمنع الـ window يكبر لو أغلب الأسئلة متعاد استخدامها
+            if len(pending) >= chunk_size or len(window) >= chunk_size * 8:
+                yield window, pending
+                window, pending = [], []
+        if window:
+            yield window, pending
+
+    def run_stages(items):
+        for _, fn, _ in stages:
+            if items:
+                items = fn(items)
+        return items
+
+    if pipelined:
+        results = run_pipeline(windows(), stages, queue_size=queue_size)
+    else:
+        results = ((window, run_stages(pending)) for window, pending in windows())
+
+    for window, enhanced in results:
+        counts["recomputed"] += len(enhanced)
+        enhanced = iter(enhanced)
+        records = [(qid, ready if ready is not None else next(enhanced)) for qid, ready in window]
+        with metrics.stage("io", items=len(records)):
+            checkpoint.append(records)
+        print(f"✅ تم تحسين {counts['reused'] + counts['recomputed']} سؤال")
+
+    reused, recomputed = counts["reused"], counts["recomputed"]
+    if incremental:
+        print(f"♻️ وضع التحديث: {reused} سؤال متعاد استخدامه، {recomputed} سؤال اتعالج")
+
+    with metrics.stage("io"):
+        checkpoint.compact(output_file)
+        checkpoint.remove()
+    return reused, recomputed
+
+
+def shard_ranges(total, shards):
+    """تقسيم [0, total) على shards أجزاء متتالية أحجامها متقاربة."""
+    bounds = [total * k // shards for k in range(shards + 1)]
+    return [(bounds[k], bounds[k + 1]) for k in range(shards) if bounds[k] < bounds[k + 1]]
+
+
+def file_fingerprint(path, chunk_size=1 << 20):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _remove_shard(shard_file):
+    for path in (shard_file, shard_file + ".partial.jsonl", shard_file + ".meta.json"):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _shard_meta(shard_file):
+    try:
+        with open(shard_file + ".meta.json", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def run_sharded(input_file, output_file, shard_worker, workers, threads_per_worker=None, **kwargs):
+    """يقسم الأسئلة بالترتيب على workers processes، وكل واحدة بتكتب ناتجها في ملف لوحدها
+    وبعدين الملفات بتتدمج بنفس ترتيب الدخل.
+
+    shard_worker(input_file, shard_file, index_range, num_threads, **kwargs) لازم تبقى دالة
+    على مستوى الـ module (عشان تتبعت لـ process تانية) وترجع True لو خلصت.
+    كل shard ليها checkpoint بتاعها، فلو وقفنا في النص بنكمل الـ shards اللي ماخلصتش بس.
+    جنب كل shard ملف meta فيه الـ range وبصمة ملف الدخل، والـ shard القديمة بتتستخدم بس لو
+    الاتنين زي التشغيل ده (عدد workers مختلف أو دخل اتغير = تتمسح وتتحسب من الأول).
+    """
+    total = sum(1 for _ in iter_questions(input_file, normalize=False))
+    ranges = shard_ranges(total, workers)
+    shard_files = [f"{output_file}.shard{k}.json" for k in range(len(ranges))]
+    fingerprint = file_fingerprint(input_file)
+    # shards زيادة من تشغيل قديم بعدد workers أكبر
+    for stale in glob.glob(glob.escape(output_file) + ".shard*.json"):
+        if re.fullmatch(r"\d+", stale[len(output_file) + 6:-5]) and stale not in shard_files:
+            _remove_shard(stale)
+    # threads الموديل في كل process بحيث المجموع مايزيدش عن عدد الأنوية
+    threads = threads_per_worker or max(1, (os.cpu_count() or 1) // len(ranges or [0]))
+    print(f"🧩 تقسيم {total} سؤال على {len(ranges)} process ({threads} thread لكل واحدة)")
+
+    # spawn مش fork: الـ process الجديدة مش بتورث اتصال SQLite بتاع كاش الترجمة ولا موديلات
+    # اتحملت قبل كده في الأب (torch ممكن يعلق بعد fork، و configure(num_threads) مش بتأثر عليها)
+    spawn = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=len(ranges) or 1, mp_context=spawn) as pool:
+        futures = []
+        for shard_file, index_range in zip(shard_files, ranges):
+            meta = {"range": list(index_range), "input": fingerprint}
+            if _shard_meta(shard_file) != meta:
+                # shard (أو checkpoint) من تشغيل بـ range أو دخل مختلف
+                _remove_shard(shard_file)
+                with open(shard_file + ".meta.json", "w", encoding="utf-8") as f:
+                    json.dump(meta, f)
+            elif os.path.exists(shard_file) and not os.path.exists(shard_file + ".partial.jsonl"):
+                # الـ shard دي خلصت في تشغيل سابق اتقطع قبل الدمج
+                continue
+            futures.append(pool.submit(shard_worker, input_file, shard_file, index_range, threads, **kwargs))
+        if not all(future.result() for future in futures):
+            raise RuntimeError("فيه shard ماخلصتش، شغل تاني عشان تكمل من الـ checkpoint بتاعها")
+
+    with metrics.stage("io", items=total):
+        merged = (item for f in shard_files for item in iter_questions(f, normalize=False))
+        write_questions(merged, output_file)
+    for shard_file in shard_files:
+        _remove_shard(shard_file)
+    return total
@@ -1,39 +1,115 @@
-import pdfplumber
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
 from pyarabic import araby
 
-def extract_and_clean_arabic(pdf_path):
-    text = ""
+# تنظيف النص: إزالة التشكيل وتوحيد الحروف
+def clean_arabic_text(text):
+    text = araby.strip_diacritics(text)
+    return text.replace('ى', 'ي').replace('ة', 'ه')
+
+# تحويل "1-20,25" لأرقام صفحات (بتبدأ من صفر)
+def parse_page_range(spec):
+    pages = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-", 1)
+            pages.extend(range(int(start) - 1, int(end)))
+        else:
+            pages.append(int(part) - 1)
+    return pages
+
+# بيشتغل جوه process منفصل: يفتح الـ PDF ويستخرج وينظف مجموعة صفحات
+def _extract_pages(task):
+    import pdfplumber
+    pdf_path, page_numbers = task
+    results = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for n in page_numbers:
+            start = time.perf_counter()
+            page_text = pdf.pages[n].extract_text()
+            text = clean_arabic_text(page_text) if page_text else ""
+            results.append((n, text, time.perf_counter() - start))
+    return results
+
+# استخراج الصفحات بالتوازي وإرجاعها بالترتيب (رقم الصفحة، النص، الوقت)
+def iter_clean_pages(pdf_path, pages=None, workers=None, chunk_pages=8):
+    # pdfplumber بيتعمل import هنا بس، فـ clean_arabic_text تشتغل من غيره (text_index مثلاً)
+    import pdfplumber
+    with pdfplumber.open(pdf_path) as pdf:
+        total = len(pdf.pages)
+    page_numbers = list(range(total)) if pages is None else [p for p in pages if 0 <= p < total]
+    tasks = [(pdf_path, page_numbers[i:i + chunk_pages]) for i in range(0, len(page_numbers), chunk_pages)]
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # عدد المهام الشغالة في نفس الوقت محدود عشان الذاكرة متكبرش مع حجم الكتاب
+        in_flight = deque()
+        for task in tasks:
+            in_flight.append(pool.submit(_extract_pages, task))
+            if len(in_flight) >= workers * 2:
+                yield from in_flight.popleft().result()
+        while in_flight:
+            yield from in_flight.popleft().result()
+
+# استخراج الكتاب لملف نصي صفحة صفحة مع تقرير بالوقت
+def extract_to_file(pdf_path, output_path, pages=None, workers=None):
+    started = time.perf_counter()
+    page_count = chars = 0
+    with open(output_path, "w", encoding="utf-8") as f:
+        for n, text, seconds in iter_clean_pages(pdf_path, pages=pages, workers=workers):
+            # سطر فاضي بين الصفحات عشان text_index يقفل الفقرة عند آخر الصفحة
+            if text:
+                f.write(text + "\n\n")
+            page_count += 1
+            chars += len(text)
+            print(f"📄 صفحة {n + 1}: {len(text)} حرف في {seconds * 1000:.0f} ms")
+    elapsed = time.perf_counter() - started
+    print(f"✅ تم استخراج {page_count} صفحة ({chars} حرف) في {elapsed:.1f} ثانية")
+    return page_count
+
+def extract_and_clean_arabic(pdf_path, pages=None, workers=None):
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
-        
-        # تنظيف النص
-        text = araby.strip_diacritics(text)
-        text = text.replace('ى', 'ي').replace('ة', 'ه')
-        
+        text = "".join(
+            page_text + "\n\n"
+            for _, page_text, _ in iter_clean_pages(pdf_path, pages=pages, workers=workers)
+            if page_text
+        )
+
         print("✅ تم استخراج النص بنجاح!")
         print(f"📄 عدد الأحرف: {len(text)}")
         print("📝 أول 200 حرف:")
         print(text[:200])
-        
+
         return text
-    
+
     except Exception as e:
         print(f"❌ خطأ: {e}")
         return None
 
 # استخدام الكود
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="استخراج وتنظيف النص العربي من PDF")
     # ضع مسار الـ PDF هنا
-    pdf_path = "D:\\rag_bot_book\\98 (2).pdf"  # غير اسم الملف هنا
-    
-    text = extract_and_clean_arabic(pdf_path)
-    
-    if text:
-        # حفظ النص في ملف
-        with open("extracted_text.txt", "w", encoding="utf-8") as f:
-            f.write(text)
-        print("💾 تم حفظ النص في ملف extracted_text.txt")
\ No newline at end of file
+    parser.add_argument("pdf_path", nargs="?", default="D:\\rag_bot_book\\98 (2).pdf")
+    parser.add_argument("-o", "--output", default="extracted_text.txt")
+    parser.add_argument("--pages", help="مدى الصفحات مثلاً 1-50,60")
+    parser.add_argument("--workers", type=int, help="عدد الـ processes (الافتراضي عدد الأنوية)")
+    parser.add_argument("--index", help="ملف فهرس البحث اللي يتبني من النص بعد الاستخراج (text_index.py)")
+    args = parser.parse_args()
+
+    pages = parse_page_range(args.pages) if args.pages else None
+    try:
+        extract_to_file(args.pdf_path, args.output, pages=pages, workers=args.workers)
+        print(f"💾 تم حفظ النص في ملف {args.output}")
+        if args.index:
+            from text_index import build_index
+            build_index(args.output, args.index)
+    except Exception as e:
+        print(f"❌ خطأ: {e}")
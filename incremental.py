@@ -0,0 +1,32 @@
+import hashlib
+import json
+import os
+
+from question_io import load_questions
+
+# الحقول اللي لو اتغير أي واحد فيها السؤال لازم يتعالج من جديد
+FINGERPRINT_FIELDS = ("question", "choices", "answer", "category")
+# الحقول اللي لازم تكون موجودة عشان نعتبر السؤال القديم متحسن فعلاً
+ENHANCED_FIELDS = ("versions", "versions_ar", "choices_ar", "answer_ar", "category_ar")
+
+
+def question_fingerprint(item):
+    payload = json.dumps([item.get(field) for field in FINGERPRINT_FIELDS], ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def load_previous_output(output_file):
+    """يقرا ملف الناتج القديم (لو موجود) ويرجع dict من البصمة للسؤال المتحسن."""
+    if not os.path.exists(output_file):
+        return {}
+    try:
+        previous = load_questions(output_file, normalize=False)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ تعذر قراءة الناتج القديم {output_file}: {e}")
+        return {}
+    return {
+        question_fingerprint(item): item
+        for item in previous
+        if all(field in item for field in ENHANCED_FIELDS)
+    }
+
@@ -0,0 +1,109 @@
+import cProfile
+import os
+import pstats
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+# قياسات لكل مرحلة في التحسين (paraphrase, translate, simplify, classify, io):
+# توقيتات، عدادات للـ fallbacks والأخطاء، ونسبة إصابة الكاش، وجدول ملخص في الآخر
+
+# العدادات اللي اسمها فيه كلمة من دول بتتطبع تحذير، والباقي (route_*, ...) معلومات بس
+WARNING_COUNTERS = ("error", "fallback")
+
+
+class Metrics:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.timers = defaultdict(list)
+            self.items = Counter()
+            self.counters = Counter()
+            self.caches = {}
+
+    @contextmanager
+    def stage(self, name, items=0):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.timers[name].append(elapsed)
+                self.items[name] += items
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def record_cache(self, name, stats, since=None):
+        """since = stats() من أول التشغيل: الكاش singleton فعداداته بتفضل تزيد بين التشغيلات
+        (وفي الـ shards المعمولة fork)، فبيتسجل الفرق بس."""
+        stats = dict(stats)
+        if since:
+            stats["hits"] -= since["hits"]
+            stats["misses"] -= since["misses"]
+            total = stats["hits"] + stats["misses"]
+            stats["hit_rate"] = stats["hits"] / total if total else 0.0
+        with self._lock:
+            self.caches[name] = stats
+
+    def summary(self):
+        with self._lock:
+            stages = {}
+            for name, durations in self.timers.items():
+                ordered = sorted(durations)
+                stages[name] = {
+                    "calls": len(ordered),
+                    "items": self.items[name],
+                    "total_s": sum(ordered),
+                    "mean_ms": sum(ordered) / len(ordered) * 1000,
+                    "p95_ms": ordered[int(0.95 * (len(ordered) - 1))] * 1000,
+                }
+            return {"stages": stages, "counters": dict(self.counters), "caches": dict(self.caches)}
+
+    def print_summary(self):
+        summary = self.summary()
+        total = sum(s["total_s"] for s in summary["stages"].values()) or 1
+        print(f"\n{'المرحلة':<12}{'مرات':>8}{'عناصر':>9}{'الإجمالي s':>12}{'متوسط ms':>11}{'p95 ms':>10}{'%':>7}")
+        for name, s in sorted(summary["stages"].items(), key=lambda kv: -kv[1]["total_s"]):
+            print(f"{name:<12}{s['calls']:>8}{s['items']:>9}{s['total_s']:>12.2f}"
+                  f"{s['mean_ms']:>11.1f}{s['p95_ms']:>10.1f}{s['total_s'] / total * 100:>6.0f}%")
+        for name, value in sorted(summary["counters"].items()):
+            warning = any(word in name for word in WARNING_COUNTERS)
+            print(f"{'⚠️' if warning else '🔢'} {name}: {value}")
+        for name, stats in summary["caches"].items():
+            print(f"📦 كاش {name}: {stats['hits']} موجود / {stats['misses']} جديد "
+                  f"({stats['hit_rate'] * 100:.0f}%)")
+
+
+# القياسات المشتركة للـ process
+metrics = Metrics()
+
+
+@contextmanager
+def profiled(enabled=None, output_file="enhance.prof"):
+    """cProfile حوالين التشغيل كله لو enabled (أو QUIZ_PROFILE=1)، ويكتب الملف ويطبع أتقل 20 دالة.
+
+    المراحل كلها دوال بأسماء واضحة (enhance_batch, smart_translate_batch, ...) فنفس
+    التقسيم بيبان كمان لو شغلنا py-spy من برا من غير الوضع ده.
+    """
+    if enabled is None:
+        enabled = os.environ.get("QUIZ_PROFILE") == "1"
+    if not enabled:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(output_file)
+        print(f"🔬 تم حفظ الـ profile في {output_file}")
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(20)
@@ -0,0 +1,204 @@
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmark import git_commit, peak_rss_mb
+
+# اختبار تحميل لـ deploy.py: N جلسة أطفال في نفس الوقت بـ streamlit AppTest (من غير سيرفر ولا نت).
+# كل جلسة بتحل الاختبار كله (ضغطات إجابات)، وبعدين "حاول تاني بصياغة مختلفة" وتحله تاني،
+# وبعدين "إعادة الاختبار من الأول" وتحله مرة تالتة. الجلسات بتشتغل في threads زي سيرفر streamlit
+# (process واحد، والـ cache_resource مشترك)، والنتيجة:
+#   - زمن كل ضغطة (p50 / p95 / p99)
+#   - وقت الـ CPU لكل rerun (CPU الـ process كله على عدد الـ reruns)
+#   - الذاكرة لكل جلسة (زيادة الـ RSS بعد تشغيل الجلسات كلها على عددها)
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+APP_FILE = os.path.join(HERE, "deploy.py")
+RETRY_LABEL = " حاول تاني بصياغة مختلفة"
+RESTART_LABEL = " إعادة الاختبار من الأول"
+# AppTest بيركب Runtime وهمي global ويشيله بعد كل run، فالـ runs لازم تمشي واحد واحد.
+# سكريبت deploy.py بايثون صافي تحت الـ GIL فالسيرفر الحقيقي برضه مش بيشغل اتنين مع بعض،
+# ووقت الانتظار على القفل بيتحسب في زمن الضغطة (طابور الـ reruns).
+_run_lock = threading.Lock()
+
+
+def current_rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except OSError:
+        try:
+            import psutil
+            return psutil.Process().memory_info().rss / (1024 * 1024)
+        except ImportError:
+            # من غير /proc ولا psutil: الـ peak أحسن من مفيش
+            return peak_rss_mb()
+
+
+def percentile(values, p):
+    return values[int(p * (len(values) - 1))] if values else None
+
+
+class SimulatedChild:
+    """جلسة واحدة: AppTest خاص بيها (session_state لوحده) وضغطات عشوائية بـ seed."""
+
+    def __init__(self, seed, timeout, think_time=0.0):
+        from streamlit.testing.v1 import AppTest
+        self.app = AppTest.from_file(APP_FILE, default_timeout=timeout)
+        self.rng = random.Random(seed)
+        self.think_time = think_time
+        self.latencies = []
+        self.reruns = 0
+        self.clicks = 0
+
+    def _run(self, widget=None):
+        if widget is not None and self.think_time:
+            # الطفل بيقرا السؤال قبل ما يضغط (متوسط think_time)
+            time.sleep(self.rng.uniform(0, 2 * self.think_time))
+        started = time.perf_counter()
+        with _run_lock:
+            (widget.click() if widget is not None else self.app).run()
+        if widget is not None:
+            self.latencies.append(time.perf_counter() - started)
+            self.clicks += 1
+        self.reruns += 1
+        if self.app.exception:
+            raise RuntimeError(self.app.exception[0].message)
+
+    def _button(self, label):
+        for button in self.app.button:
+            if button.label == label:
+                return button
+        raise LookupError(f"الزرار {label!r} مش موجود")
+
+    def solve(self):
+        """يجاوب لحد ما النتيجة تظهر (زرار الإعادة)."""
+        while not any(button.label == RETRY_LABEL for button in self.app.button):
+            choices = [button for button in self.app.button if (button.key or "").startswith("btn-")]
+            if not choices:
+                raise LookupError("مفيش اختيارات ولا نتيجة")
+            self._run(self.rng.choice(choices))
+
+    def play(self):
+        self._run()
+        self.solve()
+        self._run(self._button(RETRY_LABEL))
+        self.solve()
+        self._run(self._button(RESTART_LABEL))
+        self.solve()
+        return self
+
+
+def run_load_test(sessions, workers=None, seed=0, timeout=30, think_time=0.0):
+    import streamlit.testing.v1  # noqa: F401 (loggers بتوعه لازم يكونوا اتعملوا قبل set_log_level)
+    from streamlit.logger import set_log_level
+    # تحذيرات bare mode بتتكرر مع كل جلسة وكل rerun
+    set_log_level("error")
+    os.chdir(HERE)
+    # offline: الأسئلة من الملفات المحلية مش من quiz_service
+    os.environ.pop("QUIZ_SERVICE_URL", None)
+    # إجابات الجلسات الوهمية مش بتتسجل مع نتايج الأطفال الحقيقية
+    os.environ["QUIZ_RESULTS_PATH"] = os.path.join(tempfile.mkdtemp(prefix="quiz_load_"), "results.sqlite3")
+    # أول جلسة لوحدها بتحمل البنك والصورة في cache_resource، فالجلسات بعدها بتقيس الحالة المستقرة
+    SimulatedChild(seed - 1, timeout).play()
+    baseline_rss = current_rss_mb()
+
+    children = [SimulatedChild(seed + n, timeout, think_time) for n in range(sessions)]
+    errors = []
+    lock = threading.Lock()
+
+    def play(child):
+        try:
+            child.play()
+        except Exception as e:
+            with lock:
+                errors.append(str(e))
+
+    cpu_started, started = time.process_time(), time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers or sessions) as pool:
+        list(pool.map(play, children))
+    seconds, cpu = time.perf_counter() - started, time.process_time() - cpu_started
+
+    # الجلسات لسه عايشة (children) فالـ RSS دلوقتي فيه الـ session_state بتاعهم كلهم
+    rss = current_rss_mb()
+    latencies = sorted(t for child in children for t in child.latencies)
+    reruns = sum(child.reruns for child in children)
+    return {
+        "sessions": sessions,
+        "workers": workers or sessions,
+        "think_time_s": think_time,
+        "clicks": len(latencies),
+        "reruns": reruns,
+        "errors": errors,
+        "seconds": round(seconds, 3),
+        "clicks_per_s": round(len(latencies) / seconds, 2) if seconds else None,
+        "p50_ms": round(statistics.median(latencies) * 1000, 2) if latencies else None,
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2) if latencies else None,
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2) if latencies else None,
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else None,
+        "cpu_ms_per_rerun": round(cpu / reruns * 1000, 3) if reruns else None,
+        "rss_mb_per_session": round((rss - baseline_rss) / sessions, 3),
+        "rss_mb": round(rss, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="اختبار تحميل deploy.py بجلسات متزامنة (AppTest)")
+    parser.add_argument("--sessions", default="1,10,50",
+                        help="عدد الجلسات المتزامنة (ممكن كذا رقم بفصلة، كل رقم في process لوحده)")
+    parser.add_argument("--workers", type=int, help="عدد الـ threads (افتراضياً thread لكل جلسة)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=30, help="أقصى وقت لكل rerun بالثواني")
+    parser.add_argument("--think-time", type=float, default=0.0,
+                        help="متوسط وقت التفكير قبل كل ضغطة بالثواني (0 = ضغط متواصل)")
+    parser.add_argument("-o", "--output", default="load_test_results.json")
+    parser.add_argument("--run", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        sys.stdout, stdout = open(os.devnull, "w"), sys.stdout
+        try:
+            result = run_load_test(args.run, args.workers, args.seed, args.timeout, args.think_time)
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+        print(json.dumps(result, ensure_ascii=False))
+        return
+
+    import subprocess
+    results = []
+    for sessions in [int(s) for s in args.sessions.split(",")]:
+        command = [sys.executable, os.path.abspath(__file__), "--run", str(sessions),
+                   "--seed", str(args.seed), "--timeout", str(args.timeout),
+                   "--think-time", str(args.think_time)]
+        if args.workers:
+            command += ["--workers", str(args.workers)]
+        output = subprocess.check_output(command, text=True)
+        result = json.loads(output.strip().splitlines()[-1])
+        results.append(result)
+        print(f"👧 {sessions:>4} جلسة  {result['clicks']:>6} ضغطة  {result['clicks_per_s']:>8}/s  "
+              f"p50 {result['p50_ms']} ms  p95 {result['p95_ms']} ms  p99 {result['p99_ms']} ms  "
+              f"CPU {result['cpu_ms_per_rerun']} ms/rerun  {result['rss_mb_per_session']} MB/جلسة")
+        for error in result["errors"][:3]:
+            print(f"  ⚠️ {error}")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "results": results,
+        }, f, ensure_ascii=False, indent=2)
+    print(f"💾 تم حفظ النتائج في {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+import os
+import threading
+import time
+
+# سجل موديلات مشترك: كل موديل بيتحمل أول مرة يتطلب بس، ومرة واحدة في الـ process،
+# وكل السكربتات بتاخد نفس النسخة. transformers نفسها مش بتتعمل import إلا وقت التحميل.
+#
+# إعدادات من متغيرات البيئة:
+#   QUIZ_TORCH_THREADS=4   عدد threads بتاعة torch
+#   QUIZ_QUANTIZE=1        dynamic int8 quantization للـ Linear layers (CPU)
+#   QUIZ_INFERENCE_BACKEND=onnx   ONNX Runtime بدل PyTorch (onnx_backend.py، int8 إلا لو QUIZ_QUANTIZE=0)
+
+_backend = os.environ.get("QUIZ_INFERENCE_BACKEND", "torch")
+_settings = {
+    "num_threads": int(os.environ["QUIZ_TORCH_THREADS"]) if os.environ.get("QUIZ_TORCH_THREADS") else None,
+    "quantize": os.environ.get("QUIZ_QUANTIZE", "1" if _backend == "onnx" else "0") == "1",
+    "backend": _backend,
+}
+_models = {}
+_pipelines = {}
+_loaders = {}
+_warmups = {}
+_stats = {}
+_locks = {}
+_lock = threading.Lock()
+_threads_applied = False
+
+
+def configure(num_threads=None, quantize=None, backend=None):
+    """لازم تتنادي قبل أول تحميل عشان تأثر عليه. backend: "torch" أو "onnx"."""
+    global _threads_applied
+    if num_threads is not None:
+        _settings["num_threads"] = num_threads
+        _threads_applied = False
+    if quantize is not None:
+        _settings["quantize"] = quantize
+    if backend is not None:
+        _settings["backend"] = backend
+
+
+def register_loader(name, loader):
+    """loader() بترجع (tokenizer, model)؛ مفيدة للموديلات البديلة والـ stubs في الـ benchmarks."""
+    with _lock:
+        _loaders[name] = loader
+        _models.pop(name, None)
+        _pipelines.pop(name, None)
+
+
+def register_warmup(name, fn):
+    """fn(tokenizer, model) بتشتغل مرة بعد التحميل (مثلاً generate قصير يسخن الـ kernels)."""
+    _warmups[name] = fn
+
+
+def current_rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        return 0.0
+
+
+def default_device():
+    try:
+        import torch
+        return 0 if torch.cuda.is_available() else -1
+    except ImportError:
+        return -1
+
+
+def _apply_threads():
+    global _threads_applied
+    if _threads_applied or not _settings["num_threads"]:
+        return
+    import torch
+    torch.set_num_threads(_settings["num_threads"])
+    _threads_applied = True
+
+
+def _load_hf(name):
+    if _settings["backend"] == "onnx":
+        import onnx_backend
+        return onnx_backend.load(name, quantize=_settings["quantize"], num_threads=_settings["num_threads"])
+    from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+    tokenizer = AutoTokenizer.from_pretrained(name)
+    model = AutoModelForSeq2SeqLM.from_pretrained(name)
+    model.eval()
+    if _settings["quantize"]:
+        import torch
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return tokenizer, model
+
+
+def get_seq2seq(name):
+    """يرجع (tokenizer, model) للموديل، ويحمله لو أول مرة."""
+    if name in _models:
+        return _models[name]
+    with _lock:
+        lock = _locks.setdefault(name, threading.Lock())
+    with lock:
+        if name not in _models:
+            print(f"⚙️ جاري تحميل النموذج {name}...")
+            rss_before = current_rss_mb()
+            started = time.perf_counter()
+            if name not in _loaders and _settings["backend"] != "onnx":
+                _apply_threads()
+            tokenizer, model = _loaders.get(name, lambda: _load_hf(name))()
+            load_seconds = time.perf_counter() - started
+
+            warmup_seconds = 0.0
+            if name in _warmups:
+                started = time.perf_counter()
+                _warmups[name](tokenizer, model)
+                warmup_seconds = time.perf_counter() - started
+
+            _stats[name] = {
+                "load_seconds": load_seconds,
+                "warmup_seconds": warmup_seconds,
+                "rss_mb": current_rss_mb() - rss_before,
+                "quantized": _settings["quantize"] and name not in _loaders,
+                "backend": "stub" if name in _loaders else _settings["backend"],
+            }
+            _models[name] = (tokenizer, model)
+            print(f"✅ تم تحميل {name} في {load_seconds:.1f} ثانية")
+    return _models[name]
+
+
+def get_pipeline(task, name, **kwargs):
+    """pipeline فوق نفس الموديل المشترك (بدون تحميل نسخة تانية)."""
+    key = (task, name, tuple(sorted(kwargs.items())))
+    if key not in _pipelines:
+        tokenizer, model = get_seq2seq(name)
+        if name in _loaders or _settings["backend"] == "onnx":
+            _pipelines[key] = _ModelPipeline(tokenizer, model)
+        else:
+            from transformers import pipeline
+            kwargs.setdefault("device", default_device())
+            _pipelines[key] = pipeline(task, model=model, tokenizer=tokenizer, **kwargs)
+    return _pipelines[key]
+
+
+class _ModelPipeline:
+    """الموديلات المسجلة بـ register_loader وموديلات ONNX مش pipeline بتاعة transformers،
+    فبنلفها بنفس الـ attributes اللي بنستخدمها بس (tokenizer و model.generate)."""
+
+    def __init__(self, tokenizer, model):
+        self.tokenizer = tokenizer
+        self.model = model
+
+
+def loaded_models():
+    return list(_models)
+
+
+def report():
+    return {name: dict(stats) for name, stats in _stats.items()}
+
+
+def print_report():
+    for name, stats in _stats.items():
+        print(
+            f"🧠 {name}: تحميل {stats['load_seconds']:.1f}s، تسخين {stats['warmup_seconds']:.1f}s، "
+            f"ذاكرة +{stats['rss_mb']:.0f} MB{' (onnx)' if stats['backend'] == 'onnx' else ''}"
+            f"{' (int8)' if stats['quantized'] else ''}"
+        )
@@ -0,0 +1,129 @@
+import argparse
+import glob
+import os
+import time
+
+# تشغيل موديلات الـ seq2seq (T5 و NLLB) بـ ONNX Runtime على الـ CPU بدل PyTorch:
+# الموديل بيتعمله export مرة واحدة (encoder + decoder + decoder_with_past عشان الـ past key values)
+# وبعدين dynamic int8 quantization، والنتيجة بتتحفظ في QUIZ_ONNX_DIR وتتحمل منها بعد كده.
+# model_registry بيستخدمه لما QUIZ_INFERENCE_BACKEND=onnx، والموديل الناتج ليه نفس generate
+# فـ paraphrase_engine و smart_translate_batch مش بيتغيروا.
+#
+# محتاج: pip install optimum[onnxruntime]
+
+MODELS = (
+    "humarin/chatgpt_paraphraser_on_T5_base",
+    "salti/arabic-t5-small-question-paraphrasing",
+    "facebook/nllb-200-distilled-600M",
+)
+DEFAULT_ONNX_DIR = os.environ.get(
+    "QUIZ_ONNX_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "onnx_models")
+)
+
+
+def model_dir(name, quantize=True, root=DEFAULT_ONNX_DIR):
+    return os.path.join(root, name.replace("/", "__") + ("-int8" if quantize else ""))
+
+
+def _quantization_config():
+    import platform
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    if platform.machine().lower() in ("arm64", "aarch64"):
+        return AutoQuantizationConfig.arm64(is_static=False, per_channel=False)
+    return AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+
+
+def export(name, quantize=True, root=DEFAULT_ONNX_DIR):
+    """export (و quantize) لو مش موجود قبل كده، ويرجع الفولدر."""
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM, ORTQuantizer
+    from transformers import AutoTokenizer
+
+    fp32_dir = model_dir(name, quantize=False, root=root)
+    if not glob.glob(os.path.join(fp32_dir, "*.onnx")):
+        print(f"📦 جاري export {name} لـ ONNX...")
+        model = ORTModelForSeq2SeqLM.from_pretrained(name, export=True, use_cache=True)
+        model.save_pretrained(fp32_dir)
+        AutoTokenizer.from_pretrained(name).save_pretrained(fp32_dir)
+    if not quantize:
+        return fp32_dir
+
+    int8_dir = model_dir(name, quantize=True, root=root)
+    if not glob.glob(os.path.join(int8_dir, "*.onnx")):
+        print(f"🗜️ جاري int8 quantization لـ {name}...")
+        config = _quantization_config()
+        for onnx_file in sorted(glob.glob(os.path.join(fp32_dir, "*.onnx"))):
+            quantizer = ORTQuantizer.from_pretrained(fp32_dir, file_name=os.path.basename(onnx_file))
+            quantizer.quantize(save_dir=int8_dir, quantization_config=config)
+        # config والـ tokenizer جنب الملفات المضغوطة عشان الفولدر يتحمل لوحده
+        for extra in os.listdir(fp32_dir):
+            if not extra.endswith(".onnx") and os.path.isfile(os.path.join(fp32_dir, extra)):
+                target = os.path.join(int8_dir, extra)
+                if not os.path.exists(target):
+                    with open(os.path.join(fp32_dir, extra), "rb") as src, open(target, "wb") as dst:
+                        dst.write(src.read())
+    return int8_dir
+
+
+def load(name, quantize=True, num_threads=None, root=DEFAULT_ONNX_DIR):
+    """يرجع (tokenizer, model) بنفس شكل model_registry._load_hf."""
+    from onnxruntime import SessionOptions
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+    from transformers import AutoTokenizer
+
+    path = export(name, quantize=quantize, root=root)
+    suffix = "_quantized.onnx" if quantize else ".onnx"
+    files = {}
+    for part in ("encoder", "decoder", "decoder_with_past"):
+        file_name = f"{part}_model{suffix}"
+        if os.path.exists(os.path.join(path, file_name)):
+            files[f"{part}_file_name"] = file_name
+
+    options = SessionOptions()
+    if num_threads:
+        options.intra_op_num_threads = num_threads
+    model = ORTModelForSeq2SeqLM.from_pretrained(
+        path, use_cache="decoder_with_past_file_name" in files, session_options=options, **files
+    )
+    return AutoTokenizer.from_pretrained(path), model
+
+
+def verify(name, questions, quantize=True):
+    """يقارن ناتج PyTorch و ONNX على نفس الأسئلة (greedy) ويطبع نسبة التطابق والسرعة."""
+    from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(name)
+    torch_model = AutoModelForSeq2SeqLM.from_pretrained(name).eval()
+    _, onnx_model = load(name, quantize=quantize)
+
+    outputs, seconds = {}, {}
+    for label, model in (("torch", torch_model), ("onnx", onnx_model)):
+        started = time.perf_counter()
+        decoded = []
+        for question in questions:
+            inputs = tokenizer([question], return_tensors="pt")
+            decoded.extend(tokenizer.batch_decode(model.generate(**inputs, max_length=60),
+                                                  skip_special_tokens=True))
+        seconds[label] = time.perf_counter() - started
+        outputs[label] = decoded
+
+    same = sum(a == b for a, b in zip(outputs["torch"], outputs["onnx"]))
+    print(f"🔍 {name}: {same}/{len(questions)} نفس الناتج، "
+          f"{seconds['torch'] / len(questions) * 1000:.0f} ms → "
+          f"{seconds['onnx'] / len(questions) * 1000:.0f} ms لكل سؤال")
+    return same, len(questions)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="export الموديلات لـ ONNX Runtime (int8)")
+    parser.add_argument("models", nargs="*", default=list(MODELS))
+    parser.add_argument("--no-quantize", action="store_true", help="ONNX fp32 من غير int8")
+    parser.add_argument("--verify", type=int, metavar="N", default=0,
+                        help="قارن مع PyTorch على أول N سؤال من En_questions.json")
+    args = parser.parse_args()
+
+    for name in args.models:
+        print(f"✅ {name} → {export(name, quantize=not args.no_quantize)}")
+        if args.verify:
+            from question_io import load_questions
+            sample = [q["question"] for q in load_questions("En_questions.json")[:args.verify]]
+            verify(name, sample, quantize=not args.no_quantize)
@@ -0,0 +1,109 @@
+import os
+
+from instrumentation import metrics
+
+# إعادة صياغة مجمعة: بدل ما نبعت سؤال سؤال للـ pipeline بنبعت دفعات متبطنة (padded)
+# لنفس الموديل والـ tokenizer اللي جوه الـ pipeline ونقسم النتايج على الأسئلة
+
+
+def generate_paraphrase_candidates(paraphraser, questions, num_return_sequences=5, batch_size=8,
+                                   prefix="paraphrase: ", **generate_kwargs):
+    """يرجع لكل سؤال قائمة بالصياغات المقترحة (بنفس ترتيب الأسئلة)."""
+    tokenizer = paraphraser.tokenizer
+    model = paraphraser.model
+    device = getattr(model, "device", None)
+
+    # الترتيب حسب الطول يقلل الـ padding جوه كل دفعة
+    order = sorted(range(len(questions)), key=lambda i: len(questions[i]))
+    candidates = [None] * len(questions)
+
+    for start in range(0, len(order), batch_size):
+        batch = order[start:start + batch_size]
+        prompts = [f"{prefix}{questions[i]}" for i in batch]
+        inputs = tokenizer(prompts, return_tensors="pt", padding=True, truncation=True)
+        if device is not None:
+            inputs = {k: v.to(device) if hasattr(v, "to") else v for k, v in inputs.items()}
+        outputs = model.generate(**inputs, num_return_sequences=num_return_sequences, **generate_kwargs)
+        decoded = tokenizer.batch_decode(outputs, skip_special_tokens=True)
+        # generate بيرجع num_return_sequences ورا بعض لكل prompt
+        for j, i in enumerate(batch):
+            candidates[i] = decoded[j * num_return_sequences:(j + 1) * num_return_sequences]
+
+    return candidates
+
+
+def filter_paraphrases(question, candidates, num_versions=3):
+    """نفس شروط paraphrase_question: مش زي الأصل، أكتر من 3 كلمات، فيها '?'، ومن غير تكرار."""
+    unique_paraphrases = []
+    for candidate in candidates:
+        text = candidate.strip()
+        if (
+            text.lower() != question.lower() and
+            len(text.split()) > 3 and
+            '?' in text and
+            text not in unique_paraphrases
+        ):
+            unique_paraphrases.append(text)
+    return unique_paraphrases[:num_versions]
+
+
+_ranker = []
+
+
+def get_ranker():
+    """ترتيب الصياغات بالـ embeddings شغال افتراضياً، ويتقفل بـ QUIZ_PARAPHRASE_RANKER=0."""
+    if os.environ.get("QUIZ_PARAPHRASE_RANKER", "1") == "0":
+        return None
+    if not _ranker:
+        from paraphrase_ranker import ParaphraseRanker
+        _ranker.append(ParaphraseRanker())
+    return _ranker[0]
+
+
+def paraphrase_questions(paraphraser, questions, num_versions=3, batch_size=8, ranker=None):
+    """النسخة المجمعة من paraphrase_question: لكل سؤال [الأصل] + الصياغات المقبولة.
+
+    مع الـ ranker الصياغات المتقاربة في المعنى بتتشال فبيكفي نطلب num_versions + 1 بس.
+    """
+    if not paraphraser:
+        metrics.count("paraphrase_fallback", len(questions))
+        return [[q] * (num_versions + 1) for q in questions]
+    try:
+        ranker = ranker or get_ranker()
+    except Exception as e:
+        # من غير ترتيب بالمعنى الصياغات بتتفلتر بالنص زي الأول
+        print(f"⚠️ تعذر تحميل ترتيب الصياغات: {e}")
+        metrics.count("rank_error")
+        ranker = None
+    try:
+        candidates = generate_paraphrase_candidates(
+            paraphraser,
+            questions,
+            num_return_sequences=min(num_versions + 1 if ranker else num_versions * 2, 5),
+            batch_size=batch_size,
+            num_beams=5,
+            temperature=0.7,
+            repetition_penalty=2.5,
+            max_length=60
+        )
+    except Exception as e:
+        print(f"⚠️ خطأ في إعادة الصياغة: {e}")
+        metrics.count("paraphrase_error")
+        metrics.count("paraphrase_fallback", len(questions))
+        return [[q] * (num_versions + 1) for q in questions]
+    if ranker:
+        try:
+            with metrics.stage("rank", items=len(questions)):
+                accepted = [filter_paraphrases(q, c, len(c)) for q, c in zip(questions, candidates)]
+                ranked = ranker.rank_batch(questions, accepted, num_versions)
+        except Exception as e:
+            print(f"⚠️ خطأ في ترتيب الصياغات: {e}")
+            metrics.count("rank_error")
+            ranker = None
+    if not ranker:
+        return [
+            [q] + filter_paraphrases(q, c, num_versions)
+            for q, c in zip(questions, candidates)
+        ]
+    metrics.count("paraphrase_near_duplicate", sum(len(a) for a in accepted) - sum(len(r) for r in ranked))
+    return [[q] + r for q, r in zip(questions, ranked)]
@@ -0,0 +1,127 @@
+import os
+import re
+import zlib
+
+import numpy as np
+
+# ترتيب صياغات السؤال بالمعنى مش بالنص: كل الصياغات بتاعة الدفعة بتتحول لـ embeddings
+# في استدعاء واحد، وبعدين لكل سؤال:
+#   - نشيل اللي بعيدة عن معنى السؤال الأصلي (أقل من min_similarity، مع encoder حقيقي بس)
+#   - نشيل اللي تقريباً نسخة من الأصل أو من صياغة اخترناها (أكتر من duplicate_threshold)
+#   - نختار الباقي بالـ MMR: قريبة من الأصل وبعيدة عن اللي اخترناه
+# من غير ما نستدعي موديل الصياغة تاني.
+#
+# الـ encoder: sentence-transformers لو متسطبة (QUIZ_EMBEDDER اسم الموديل)،
+# وإلا encoder بسيط بالـ hashing على حروف وكلمات (من غير أي تحميل).
+
+DEFAULT_EMBEDDER = "sentence-transformers/all-MiniLM-L6-v2"
+_encoders = {}
+
+
+class HashingEncoder:
+    """character 3-grams + كلمات في vector ثابت الطول؛ كفاية يفرق "initial character" عن "first letter"."""
+
+    # التشابه هنا بالحروف فالأرقام أوطى من encoder حقيقي، ومايقدرش يقيس المعنى:
+    # "Tell me the alphabet character following B?" بعيدة بالحروف عن "Which letter comes after 'B'?"
+    # فمفيش حد أدنى (بيشيل النسخ المكررة بس)
+    duplicate_threshold = 0.85
+    min_similarity = None
+
+    def __init__(self, dim=1024):
+        self.dim = dim
+
+    def _features(self, text):
+        text = text.lower()
+        words = re.findall(r"\w+", text)
+        padded = f" {' '.join(words)} "
+        grams = [padded[i:i + 3] for i in range(len(padded) - 2)]
+        return grams + ["w:" + w for w in words]
+
+    def encode(self, texts):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                h = zlib.crc32(feature.encode("utf-8"))
+                vectors[row, h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        return vectors
+
+
+class SentenceTransformerEncoder:
+    duplicate_threshold = 0.92
+    min_similarity = 0.5
+
+    def __init__(self, name):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(name)
+
+    def encode(self, texts):
+        return np.asarray(self.model.encode(list(texts), batch_size=64, convert_to_numpy=True), dtype=np.float32)
+
+
+def get_encoder(name=None):
+    """بيتعمل مرة واحدة في الـ process؛ "hashing" أو لو الموديل مش متاح = HashingEncoder."""
+    name = name or os.environ.get("QUIZ_EMBEDDER", DEFAULT_EMBEDDER)
+    if name not in _encoders:
+        if name == "hashing":
+            _encoders[name] = HashingEncoder()
+        else:
+            try:
+                _encoders[name] = SentenceTransformerEncoder(name)
+            except ImportError:
+                _encoders[name] = HashingEncoder()
+            except Exception as e:
+                # المكتبة موجودة بس الموديل مش متحمل ومفيش نت (OSError) أو أي خطأ في التحميل
+                print(f"⚠️ تعذر تحميل {name} ({e})، هنستخدم hashing encoder")
+                _encoders[name] = HashingEncoder()
+    return _encoders[name]
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class ParaphraseRanker:
+
+    def __init__(self, encoder=None, duplicate_threshold=None, min_similarity=None, diversity=0.5):
+        """الحدود الافتراضية بتيجي من الـ encoder نفسه."""
+        self.encoder = encoder or get_encoder()
+        self.duplicate_threshold = duplicate_threshold or self.encoder.duplicate_threshold
+        self.min_similarity = self.encoder.min_similarity if min_similarity is None else min_similarity
+        self.diversity = diversity
+
+    def rank_batch(self, questions, candidate_lists, num_versions=3):
+        """لكل سؤال يرجع لحد num_versions صياغة مختلفة في المعنى عن بعض (بترتيب الاختيار)."""
+        texts = list(dict.fromkeys([*questions, *(c for cands in candidate_lists for c in cands)]))
+        if not texts:
+            return [[] for _ in questions]
+        vectors = _normalize(self.encoder.encode(texts))
+        index = {t: i for i, t in enumerate(texts)}
+
+        return [
+            self._select(vectors[index[q]], vectors[[index[c] for c in cands]], cands, num_versions)
+            if cands else []
+            for q, cands in zip(questions, candidate_lists)
+        ]
+
+    def _select(self, question_vector, vectors, candidates, num_versions):
+        relevance = vectors @ question_vector
+        pairwise = vectors @ vectors.T
+        available = [
+            i for i in range(len(candidates))
+            if relevance[i] < self.duplicate_threshold
+            and (self.min_similarity is None or relevance[i] >= self.min_similarity)
+        ]
+        selected = []
+        while available and len(selected) < num_versions:
+            if selected:
+                redundancy = pairwise[np.ix_(available, selected)].max(axis=1)
+            else:
+                redundancy = np.zeros(len(available))
+            scores = (1 - self.diversity) * relevance[available] - self.diversity * redundancy
+            best = available[int(np.argmax(scores))]
+            selected.append(best)
+            available = [i for i in available
+                         if i != best and pairwise[i, best] < self.duplicate_threshold]
+        return [candidates[i] for i in selected]
@@ -1,127 +1,197 @@
-from transformers import pipeline
-from deep_translator import GoogleTranslator
-import json
 import time
 import re
+from translation_cache import get_cache
+from translation_executor import TranslationExecutor, make_backend
+from enhance_stream import run_enhancement, run_sharded
+from paraphrase_engine import paraphrase_questions
+from arabic_rewrite import RewriteEngine
+from model_registry import configure, get_pipeline, print_report
+from translation_router import DEFAULT_GLOSSARY
+from instrumentation import metrics, profiled
 
-def enhance_question_quality(input_file, output_file):
-   
-    def get_paraphraser():
-        try:
-            return pipeline(
-                "text2text-generation",
-                model="humarin/chatgpt_paraphraser_on_T5_base",
-                device=0, 
-                max_length=60
-            )
-        except Exception as e:
-            print(f" خطأ في تحميل النموذج: {e}")
-            return None
-    
-    def paraphrase_question(paraphraser, question, num_versions=3):
-        
-        if not paraphraser:
-            return [question] * (num_versions + 1)
-            
-        versions = [question]
-        num_candidates = num_versions * 2
-        
-        try:
-            paraphrases = paraphraser(
-                f"paraphrase: {question}",
-                num_return_sequences=min(num_candidates, 5), 
-                num_beams=5,
-                temperature=0.7,
-                repetition_penalty=2.5
-            )
-            
-            unique_paraphrases = set()
-            for p in paraphrases:
-                text = p['generated_text'].strip()
-                
-                if (
-                    text.lower() != question.lower() and
-                    len(text.split()) > 3 and
-                    '?' in text
-                ):
-                    unique_paraphrases.add(text)
-                    
-            versions.extend(list(unique_paraphrases)[:num_versions])
-            return versions
-            
-        except Exception as e:
-            print(f"⚠️ خطأ في إعادة الصياغة: {e}")
-            return [question] * (num_versions + 1)
+def get_paraphraser():
+    try:
+        return get_pipeline(
+            "text2text-generation",
+            "humarin/chatgpt_paraphraser_on_T5_base",
+            max_length=60
+        )
+    except Exception as e:
+        print(f" خطأ في تحميل النموذج: {e}")
+        metrics.count("model_load_error")
+        return None
+
+def paraphrase_question(paraphraser, question, num_versions=3):
+    return paraphrase_questions(paraphraser, [question], num_versions=num_versions)[0]
+
+# 2. تحسين الترجمة
+# executor واحد للعملية كلها عشان نعيد استخدام الـ client والـ cache
+_translation_executor = None
+
+def get_translation_executor():
+    global _translation_executor
+    if _translation_executor is None:
+        _translation_executor = TranslationExecutor(make_backend())
+    return _translation_executor
+
+# تصحيحات ناتج الترجمة: "ه" لوحدها حرف الهاء مش أي هاء في نص كلمة
+CORRECTOR = RewriteEngine(
+    {
+        "رسائل": "حروف",
+        "جمل": "جُمل",
+        "ه": "هـ",
+        "أ": "ا",
+        "رسالة": "حرف"
+    },
+    whole_word={"ه"}
+)
+
+def correct_translation(translated):
+    return CORRECTOR.apply(translated)
+
+def translate_for_children(text, context="education"):
+    return translate_many_for_children([text])[0]
+
+def translate_many_for_children(texts, executor=None):
+    executor = executor or get_translation_executor()
+    try:
+        return [correct_translation(t) for t in executor.translate_many(texts, 'auto', 'ar')]
+    except Exception as e:
+        print(f"⚠️ خطأ في الترجمة: {e}")
+        metrics.count("translate_error")
+        metrics.count("translate_fallback", len(texts))
+        return list(texts)
+
+#  تبسيط اللغة
+SIMPLIFIER = RewriteEngine(
+    {
+        "أي": "ما",
+        "التي": "اللي",
+        "تستطيع": "تقدر",
+        "يستطيع": "يقدر",
+        "المرأة": "الست",
+        "الرجل": "الراجل",
+        "الطفل": "الولد",
+        "كلمة": "كلمه",
+        "حرف": "حرف"
+    },
+    whole_word={"أي"}
+)
 
-    # 2. تحسين الترجمة
-    def translate_for_children(text, context="education"):
+def simplify_for_children(text):
+    return SIMPLIFIER.apply(text)
+
+# التصحيح والتبسيط في لفة واحدة، فالتصحيح ("أ" → "ا") مايبوظش قواعد التبسيط ("أي")
+CHILD_REWRITER = CORRECTOR.extend(SIMPLIFIER.rules, SIMPLIFIER.whole_word)
+
+# الفئات بتتثبت من القاموس بنفس الكتابة اللي deploy.py بيفلتر بيها (QUOTAS)،
+# بدل ما تعتمد على ناتج الترجمة والتصحيح ("فهم" غير "فهـم")
+CATEGORY_LABELS = {k.lower(): v for k, v in DEFAULT_GLOSSARY.items()}
+
+def pin_categories(items):
+    for item in items:
+        label = CATEGORY_LABELS.get(str(item.get('category') or "").strip().lower())
+        if label:
+            item['category_ar'] = label
+    return items
+
+# نصوص السؤال اللي بتتترجم بالترتيب: الصياغات، الاختيارات، الإجابة، الفئة
+def collect_texts(items, suffix=""):
+    texts = []
+    for item in items:
+        texts.extend(item['versions' + suffix])
+        texts.extend(item['choices' + suffix])
+        texts.append(item['answer' + suffix])
+        texts.append(item['category' + suffix] or "عام")
+    return texts
+
+def assign_translations(items, translated):
+    translated = iter(translated)
+    for item in items:
+        item['versions_ar'] = [next(translated) for _ in item['versions']]
+        item['choices_ar'] = [next(translated) for _ in item['choices']]
+        item['answer_ar'] = next(translated)
+        item['category_ar'] = next(translated)
+    return items
+
+# مراحل التحسين: إعادة الصياغة (موديل)، الترجمة (شبكة)، التصحيح والتبسيط
+def paraphrase_stage(items, paraphraser, batch_size=8):
+    # إعادة صياغة كل أسئلة الدفعة مرة واحدة قبل الترجمة
+    with metrics.stage("paraphrase", items=len(items)):
+        all_versions = paraphrase_questions(
+            paraphraser, [item['question'] for item in items], batch_size=batch_size
+        )
+    for item, versions in zip(items, all_versions):
+        item['versions'] = versions
+    return items
+
+def translate_stage(items, executor=None):
+    # كل نصوص الدفعة بتتبعت للـ executor مرة واحدة فتتترجم بالتوازي
+    texts = collect_texts(items)
+    executor = executor or get_translation_executor()
+    with metrics.stage("translate", items=len(texts)):
+        return assign_translations(items, executor.translate_many(texts, 'auto', 'ar'))
+
+def simplify_stage(items):
+    texts = collect_texts(items, "_ar")
+    with metrics.stage("simplify", items=len(texts)):
+        return pin_categories(assign_translations(items, CHILD_REWRITER.apply_batch(texts)))
+
+def enhance_batch(items, paraphraser, batch_size=8, executor=None):
+    items = paraphrase_stage(items, paraphraser, batch_size=batch_size)
+    items = translate_stage(items, executor=executor)
+    return simplify_stage(items)
+
+# pipelined=True: الصياغة على الـ CPU والترجمة على الشبكة بيشتغلوا في نفس الوقت على دفعات مختلفة
+# workers > 1: الأسئلة بتتقسم على processes (كل واحدة بموديلاتها) وبعدين تتدمج بنفس الترتيب
+def enhance_question_quality(input_file, output_file, incremental=False, batch_size=8,
+                             chunk_size=64, checkpoint_file=None, concurrency=8, rate=10.0,
+                             profile=None, pipelined=False, translate_workers=2,
+                             workers=1, threads_per_worker=None, index_range=None, previous_file=None):
+    if workers > 1:
         try:
-            if len(text.split()) > 3:
-                prefixed_text = f"{text}"
-            else:
-                prefixed_text = text
-                
-            translated = GoogleTranslator(source='auto', target='ar').translate(prefixed_text)
-            
-            corrections = {
-                "رسائل": "حروف",
-                "جمل": "جُمل",
-                "ه": "هـ",
-                "أ": "ا",
-                "رسالة": "حرف"
-            }
-            
-            for wrong, correct in corrections.items():
-                translated = translated.replace(wrong, correct)
-                
-            return translated
+            run_sharded(
+                input_file, output_file, enhance_shard, workers, threads_per_worker,
+                previous_file=output_file, batch_size=batch_size, chunk_size=chunk_size,
+                incremental=incremental, pipelined=pipelined, translate_workers=translate_workers,
+                concurrency=concurrency, rate=rate
+            )
+            print(f"🎉 تم دمج الـ shards في: {output_file}")
+            return True
         except Exception as e:
-            print(f"⚠️ خطأ في الترجمة: {e}")
-            return text
-
-    #  تبسيط اللغة
-    def simplify_for_children(text):
-        simplifications = {
-            "أي": "ما",
-            "التي": "اللي",
-            "تستطيع": "تقدر",
-            "يستطيع": "يقدر",
-            "المرأة": "الست",
-            "الرجل": "الراجل",
-            "الطفل": "الولد",
-            "كلمة": "كلمه",
-            "حرف": "حرف"
-        }
-        
-        for complex_word, simple_word in simplifications.items():
-            text = text.replace(complex_word, simple_word)
-        
-        return text
+            print(f"❌ خطأ أثناء المعالجة: {e}")
+            return False
 
+    metrics.reset()
+    cache_start = get_cache().stats()
     try:
-        with open(input_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        # الموديل بيتحمل أول ما نحتاجه بس
+        paraphraser = []
+        executor = TranslationExecutor(make_backend(), max_workers=concurrency, rate=rate)
         
-        paraphraser_model = get_paraphraser()
+        def paraphrase_chunk(items):
+            if not paraphraser:
+                paraphraser.append(get_paraphraser())
+            return paraphrase_stage(items, paraphraser[0], batch_size=batch_size)
         
-        for i, item in enumerate(data):
-            item['versions'] = paraphrase_question(paraphraser_model, item['question'])
-            
-            item['versions_ar'] = [simplify_for_children(translate_for_children(v)) 
-                                   for v in item['versions']]
-            
-            item['choices_ar'] = [simplify_for_children(translate_for_children(c)) 
-                                  for c in item['choices']]
-            
-            item['answer_ar'] = simplify_for_children(translate_for_children(item['answer']))
-            
-            item['category_ar'] = simplify_for_children(translate_for_children(item['category']))
-            
-            print(f"✅ تم تحسين السؤال {i+1}/{len(data)}")
-        
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        stages = [
+            ("paraphrase", paraphrase_chunk, 1),
+            ("translate", lambda items: translate_stage(items, executor=executor), translate_workers),
+            ("simplify", simplify_stage, 1),
+        ]
+        try:
+            with profiled(profile):
+                run_enhancement(
+                    input_file, output_file, stages=stages, pipelined=pipelined,
+                    chunk_size=chunk_size, checkpoint_file=checkpoint_file, incremental=incremental,
+                    index_range=index_range, previous_file=previous_file
+                )
+        finally:
+            executor.close()
             
+        metrics.record_cache("الترجمة", get_cache().stats(), since=cache_start)
+        metrics.print_summary()
+        print_report()
         print(f"🎉 تم حفظ الأسئلة المحسنة في {output_file}")
         return True
         
@@ -129,8 +199,13 @@ def enhance_question_quality(input_file, output_file):
         print(f"❌ خطأ جسيم في المعالجة: {e}")
         return False
 
+# worker لوضع الـ shards: process جديدة بتحمل الموديلات مرة واحدة بعدد threads محدد
+def enhance_shard(input_file, shard_file, index_range, num_threads, **kwargs):
+    configure(num_threads=num_threads)
+    return enhance_question_quality(input_file, shard_file, index_range=index_range, **kwargs)
+
 if __name__ == "__main__":
     input_path = "D:\\company\\En_questions.json"
     output_path = "D:\\company\\enhanced_questions2.json"
     
-    enhance_question_quality(input_path, output_path)
\ No newline at end of file
+    enhance_question_quality(input_path, output_path, incremental=True)
\ No newline at end of file
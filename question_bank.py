@@ -0,0 +1,47 @@
+from collections import defaultdict
+
+from question_io import load_questions
+
+# بنك الأسئلة: بيتحمل مرة واحدة لكل process وبيتعمله فهارس بالفئة وبالـ id
+# عشان كل rerun في streamlit يشتغل على أرقام بدل ما يلف على الملف كله
+
+
+class QuestionBank:
+
+    def __init__(self, questions):
+        self.questions = questions
+        self.by_id = {}
+        self.by_category = defaultdict(list)
+        for index, q in enumerate(questions):
+            qid = q.get("id", index)
+            self.by_id[qid] = q
+            self.by_category[q.get("category_ar")].append(qid)
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def add(self, question):
+        """إضافة سؤال جديد أو استبدال سؤال بنفس الـ id (المخزن الأصلي نفسه مش بيتغير)."""
+        qid = question["id"]
+        old = self.by_id.get(qid)
+        if old is not None and old.get("category_ar") != question.get("category_ar"):
+            self.by_category[old.get("category_ar")].remove(qid)
+            old = None
+        self.by_id[qid] = question
+        if old is None:
+            self.by_category[question.get("category_ar")].append(qid)
+
+    def get(self, qid):
+        return self.by_id[qid]
+
+    def category(self, category_ar):
+        return self.by_category.get(category_ar, [])
+
+
+def load_bank(path="enhanced_questions.json"):
+    # ملف .qstore (من question_store.py build) بيتفتح بـ mmap والنصوص بتتفك وقت العرض بس
+    if path.endswith(".qstore"):
+        from question_store import QuestionStore
+        return QuestionBank(QuestionStore(path))
+    # أي صيغة من صيغ ملفات الأسئلة (question_io) بتتوحد وقت التحميل
+    return QuestionBank(load_questions(path))
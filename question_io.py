@@ -0,0 +1,133 @@
+import argparse
+import json
+import os
+import re
+from collections import Counter
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# قراية وكتابة ملفات الأسئلة بكل الصيغ اللي في المشروع وتحويلها لشكل واحد:
+#   english   En_questions.json                 question / choices / answer / category
+#   enhanced  enhanced_questions*.json, error.json   + versions / versions_ar / choices_ar / answer_ar / category_ar
+#   arabic    Arabic_model/arabic_questions.json    السؤال / الاختيارات / الإجابة_الصحيحة / الفئة (أو question_ar)
+#   options   questions_with_versions.json         question (أو original) / options {"A": ...} / answer "A"
+# السؤال بعد التوحيد dict بالمفاتيح الإنجليزية، ولو نصه عربي حقول _ar بتتملى من نفس النص
+# عشان deploy.py يقدر يعرضه على طول. orjson بيتستخدم لو متسطب، والكتابة compact افتراضياً.
+
+KEY_ALIASES = {
+    "السؤال": "question",
+    "question_ar": "question",
+    "original": "question",
+    "الاختيارات": "choices",
+    "الإجابة_الصحيحة": "answer",
+    "correct_answer": "answer",
+    "الفئة": "category",
+}
+ARABIC = re.compile(r"[؀-ۿ]")
+
+
+# ---------- JSON ----------
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj, pretty=False):
+    """نص JSON من غير escape للعربي؛ compact إلا لو pretty."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0).decode("utf-8")
+    if pretty:
+        return json.dumps(obj, ensure_ascii=False, indent=2)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+# ---------- SCHEMAS ----------
+def detect_schema(item):
+    if "السؤال" in item or "question_ar" in item:
+        return "arabic"
+    if isinstance(item.get("options"), dict):
+        return "options"
+    if "versions_ar" in item:
+        return "enhanced"
+    return "english"
+
+
+def normalize_question(item):
+    """يرجع نسخة من السؤال بالمفاتيح الموحدة (المفاتيح اللي مش معروفة بتفضل زي ما هي)."""
+    q = {}
+    for key, value in item.items():
+        key = KEY_ALIASES.get(key, key)
+        q.setdefault(key, value)
+    if isinstance(q.get("options"), dict):
+        options = q.pop("options")
+        q["choices"] = list(options.values())
+        q["answer"] = options.get(q.get("answer"), q.get("answer"))
+    if ARABIC.search(str(q.get("question", ""))):
+        q.setdefault("versions_ar", q.get("versions") or [q["question"]])
+        q.setdefault("choices_ar", q.get("choices", []))
+        q.setdefault("answer_ar", q.get("answer"))
+        q.setdefault("category_ar", q.get("category"))
+    return q
+
+
+# ---------- FILES ----------
+def iter_records(path, normalize=True):
+    """الأسئلة من ملف .json (array) أو .jsonl؛ الـ JSONL بيتقري سطر سطر."""
+    if path.endswith(".jsonl"):
+        with open(path, "rb") as f:
+            for line in f:
+                if line.strip():
+                    item = loads(line)
+                    yield normalize_question(item) if normalize else item
+        return
+    with open(path, "rb") as f:
+        items = loads(f.read())
+    for item in items:
+        yield normalize_question(item) if normalize else item
+
+
+def load_questions(path, normalize=True):
+    return list(iter_records(path, normalize=normalize))
+
+
+def write_questions(items, path, pretty=False):
+    """.jsonl سطر لكل سؤال، وغير كده JSON array. الكتابة على ملف مؤقت وبعدين replace."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            for item in items:
+                f.write(dumps(item) + "\n")
+        else:
+            f.write("[")
+            for n, item in enumerate(items):
+                if pretty:
+                    f.write(("," if n else "") + "\n  " + dumps(item, pretty=True).replace("\n", "\n  "))
+                else:
+                    f.write(("," if n else "") + dumps(item))
+            f.write("\n]" if pretty else "]")
+    os.replace(tmp_path, path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="التعرف على صيغ ملفات الأسئلة وتوحيدها")
+    sub = parser.add_subparsers(dest="command", required=True)
+    detect = sub.add_parser("detect", help="عدد الأسئلة من كل صيغة في كل ملف")
+    detect.add_argument("files", nargs="+")
+    convert = sub.add_parser("convert", help="تحويل ملف للصيغة الموحدة (.json أو .jsonl)")
+    convert.add_argument("input")
+    convert.add_argument("output")
+    convert.add_argument("--pretty", action="store_true")
+    args = parser.parse_args()
+
+    if args.command == "detect":
+        for path in args.files:
+            counts = Counter(detect_schema(item) for item in iter_records(path, normalize=False))
+            print(f"📄 {path}: " + "، ".join(f"{schema} {n}" for schema, n in counts.most_common()))
+    else:
+        items = load_questions(args.input)
+        write_questions(items, args.output, pretty=args.pretty)
+        print(f"💾 تم تحويل {len(items)} سؤال إلى {args.output}")
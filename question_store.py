@@ -0,0 +1,213 @@
+import json
+import mmap
+import os
+import struct
+
+from enhance_stream import iter_questions
+
+# مخزن أسئلة مضغوط (ملف .qstore) بيتفتح بـ mmap:
+#   header | جدول offsets للنصوص | النصوص utf-8 ورا بعض | جدول القوائم | سجلات ثابتة الحجم
+# كل نص بيتخزن مرة واحدة (الفئات والحروف بتتكرر كتير)، والنص مش بيتفك إلا لما يتعرض
+
+MAGIC = b"QSTR"
+VERSION = 2
+MISSING = 0xFFFFFFFF
+_ABSENT = object()
+
+HEADER = struct.Struct("<4sIIIQQQQ")
+SCALAR_FIELDS = ("id", "question", "answer", "category", "answer_ar", "category_ar", "answer_index", "extra")
+# الحقول دي بتتخزن JSON عشان ترجع بنفس النوع (رقم أو نص)
+JSON_FIELDS = ("id", "answer_index")
+LIST_FIELDS = ("versions", "versions_ar", "choices", "choices_ar")
+RECORD = struct.Struct("<" + "I" * len(SCALAR_FIELDS) + "II" * len(LIST_FIELDS))
+OFFSET = struct.Struct("<Q")
+STRING_ID = struct.Struct("<I")
+
+
+class LazyStringList:
+    """قائمة نصوص من المخزن: كل عنصر بيتفك لما يتطلب بس."""
+
+    __slots__ = ("_store", "_start", "_length")
+
+    def __init__(self, store, start, length):
+        self._store = store
+        self._start = start
+        self._length = length
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError(index)
+        return self._store._list_string(self._start + index)
+
+    def __iter__(self):
+        for i in range(self._length):
+            yield self[i]
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+
+class QuestionRecord:
+    """سؤال واحد من المخزن بيتعامل زي الـ dict (q['versions_ar'][0]، q.get('category_ar'))."""
+
+    __slots__ = ("_store", "_fields")
+
+    def __init__(self, store, fields):
+        self._store = store
+        self._fields = fields
+
+    def _value(self, key):
+        if key in SCALAR_FIELDS and key != "extra":
+            sid = self._fields[SCALAR_FIELDS.index(key)]
+            if sid == MISSING:
+                raise KeyError(key)
+            value = self._store._string(sid)
+            return json.loads(value) if key in JSON_FIELDS else value
+        if key in LIST_FIELDS:
+            pos = len(SCALAR_FIELDS) + 2 * LIST_FIELDS.index(key)
+            start, length = self._fields[pos], self._fields[pos + 1]
+            if start == MISSING:
+                raise KeyError(key)
+            return LazyStringList(self._store, start, length)
+        return self._extra()[key]
+
+    def _extra(self):
+        sid = self._fields[SCALAR_FIELDS.index("extra")]
+        return json.loads(self._store._string(sid)) if sid != MISSING else {}
+
+    def __getitem__(self, key):
+        return self._value(key)
+
+    def get(self, key, default=None):
+        try:
+            return self._value(key)
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return self.get(key, _ABSENT) is not _ABSENT
+
+    def to_dict(self):
+        item = {}
+        for key in SCALAR_FIELDS[:-1] + LIST_FIELDS:
+            value = self.get(key, _ABSENT)
+            if value is not _ABSENT:
+                item[key] = list(value) if key in LIST_FIELDS else value
+        item.update(self._extra())
+        return item
+
+
+class QuestionStore:
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self._count, self._string_count,
+         self._offsets_at, self._blob_at, self._lists_at, self._records_at) = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} مش ملف qstore صالح")
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        return QuestionRecord(self, RECORD.unpack_from(self._mm, self._records_at + index * RECORD.size))
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self[i]
+
+    def _string(self, sid):
+        start, = OFFSET.unpack_from(self._mm, self._offsets_at + sid * OFFSET.size)
+        end, = OFFSET.unpack_from(self._mm, self._offsets_at + (sid + 1) * OFFSET.size)
+        return self._mm[self._blob_at + start:self._blob_at + end].decode("utf-8")
+
+    def _list_string(self, pos):
+        sid, = STRING_ID.unpack_from(self._mm, self._lists_at + pos * STRING_ID.size)
+        return self._string(sid)
+
+    def close(self):
+        self._mm.close()
+
+
+def build_store(input_file, output_file):
+    """يحول ملف enhanced_questions*.json لملف .qstore بنفس الحقول."""
+    strings = {}
+    list_entries = []
+    records = []
+
+    def intern(text):
+        if text not in strings:
+            strings[text] = len(strings)
+        return strings[text]
+
+    for item in iter_questions(input_file):
+        fields = []
+        for key in SCALAR_FIELDS:
+            if key == "extra":
+                extra = {k: v for k, v in item.items() if k not in SCALAR_FIELDS and k not in LIST_FIELDS}
+                fields.append(intern(json.dumps(extra, ensure_ascii=False)) if extra else MISSING)
+            elif key not in item:
+                fields.append(MISSING)
+            else:
+                fields.append(intern(json.dumps(item[key]) if key in JSON_FIELDS else str(item[key])))
+        for key in LIST_FIELDS:
+            if key not in item:
+                fields.extend((MISSING, 0))
+            else:
+                fields.extend((len(list_entries), len(item[key])))
+                list_entries.extend(intern(str(v)) for v in item[key])
+        records.append(RECORD.pack(*fields))
+
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = [0]
+    for data in encoded:
+        offsets.append(offsets[-1] + len(data))
+
+    offsets_at = HEADER.size
+    blob_at = offsets_at + len(offsets) * OFFSET.size
+    lists_at = blob_at + offsets[-1]
+    lists_at += -lists_at % 8
+    records_at = lists_at + len(list_entries) * STRING_ID.size
+    records_at += -records_at % 8
+
+    tmp_file = output_file + ".tmp"
+    with open(tmp_file, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(records), len(encoded),
+                            offsets_at, blob_at, lists_at, records_at))
+        f.write(b"".join(OFFSET.pack(o) for o in offsets))
+        f.write(b"".join(encoded))
+        f.write(b"\0" * (lists_at - f.tell()))
+        f.write(b"".join(STRING_ID.pack(sid) for sid in list_entries))
+        f.write(b"\0" * (records_at - f.tell()))
+        f.write(b"".join(records))
+    os.replace(tmp_file, output_file)
+    return len(records), len(encoded)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="بناء ملفات .qstore من ملفات الأسئلة المحسنة")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("inputs", nargs="+", help="ملفات enhanced_questions*.json")
+    parser.add_argument("-o", "--output", help="اسم الملف الناتج (لو فيه ملف دخل واحد بس)")
+    args = parser.parse_args()
+
+    for input_file in args.inputs:
+        output_file = args.output if args.output and len(args.inputs) == 1 \
+            else os.path.splitext(input_file)[0] + ".qstore"
+        count, string_count = build_store(input_file, output_file)
+        print(f"💾 {input_file} → {output_file}: {count} سؤال، {string_count} نص مختلف")
@@ -0,0 +1,272 @@
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from incremental import question_fingerprint
+from question_bank import load_bank
+from question_io import dumps, loads
+from quiz_session import build_pools
+
+# خدمة محلية بتقدم الأسئلة والصياغات والترجمات من البنك المحسوب مسبقاً على طول،
+# والموديلات بتتحمل مرة واحدة على الجهاز جوه الخدمة دي بس:
+#   GET  /index                      {الفئة: [ids]}
+#   GET  /pools                      [[الفئة، المستوى، [ids]]] لـ QuizPools من غير طلب لكل سؤال
+#   GET  /question?id=12             السؤال كامل (أو 202 لو لسه بيتحسن)
+#   GET  /translate?text=Apple       ترجمة من القاموس/الكاش (أو 202 وتتحط في الطابور)
+#   POST /questions                  أسئلة جديدة بالإنجليزي تتحسن في الخلفية
+# اللي مش موجود بيروح لـ worker واحد بيجمعه دفعات (paraphraser + NLLB من update_model)
+# والنتايج بتتكتب في ملف updates.jsonl جنب البنك وبتتقري تاني مع كل تشغيل.
+
+DEFAULT_PORT = 8765
+
+
+class QuizService:
+
+    def __init__(self, bank_file, updates_file=None, batch_size=16, max_wait=0.5):
+        self.bank = load_bank(bank_file)
+        self.updates_file = updates_file or os.path.splitext(bank_file)[0] + ".updates.jsonl"
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.pending = set()
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._paraphraser = None
+        self._load_updates()
+        self._worker = threading.Thread(target=self._run_worker, daemon=True)
+        self._worker.start()
+
+    def _load_updates(self):
+        if not os.path.exists(self.updates_file):
+            return
+        with open(self.updates_file, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    self.bank.add(loads(line))
+
+    # ---------- القراية (فورية) ----------
+    def index(self):
+        with self._lock:
+            return {category: list(ids) for category, ids in self.bank.by_category.items()}
+
+    def pools(self):
+        with self._lock:
+            return [[category, level, ids] for (category, level), ids in build_pools(self.bank).items()]
+
+    def question(self, qid):
+        """(السؤال، None) أو (None، "pending"/"missing")."""
+        with self._lock:
+            if qid in self.bank.by_id:
+                q = self.bank.get(qid)
+                return (q.to_dict() if hasattr(q, "to_dict") else q), None
+            return None, "pending" if ("question", qid) in self.pending else "missing"
+
+    def translate(self, texts):
+        """الموجود من غير موديل بيرجع، والباقي بيتحط في الطابور ويرجع في pending."""
+        import update_model
+        found = update_model.get_router().lookup(texts)
+        missing = [t for t in dict.fromkeys(texts) if t not in found]
+        for text in missing:
+            self._enqueue("text", text, text)
+        return found, missing
+
+    def submit(self, questions):
+        """الأسئلة اللي اتحسنت قبل كده بترجع ready، والباقي بيتحسن في الخلفية."""
+        statuses = []
+        for q in questions:
+            qid = q["id"] if "id" in q else "q-" + question_fingerprint(q)[:12]
+            q = dict(q, id=qid)
+            ready, _ = self.question(qid)
+            if ready is not None and "versions_ar" in ready:
+                statuses.append({"id": qid, "status": "ready"})
+            else:
+                self._enqueue("question", qid, q)
+                statuses.append({"id": qid, "status": "pending"})
+        return statuses
+
+    def _enqueue(self, kind, key, payload):
+        with self._lock:
+            if (kind, key) in self.pending:
+                return
+            self.pending.add((kind, key))
+        self._queue.put((kind, key, payload))
+
+    # ---------- الـ worker ----------
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run_worker(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                self._process(batch)
+            except Exception as e:
+                print(f"⚠️ خطأ في تحسين الدفعة: {e}")
+            finally:
+                with self._lock:
+                    self.pending.difference_update((kind, key) for kind, key, _ in batch)
+
+    def _process(self, batch):
+        import update_model
+        texts = [payload for kind, _, payload in batch if kind == "text"]
+        questions = [payload for kind, _, payload in batch if kind == "question"]
+        if texts:
+            print(f"🌐 ترجمة {len(texts)} نص في الخلفية...")
+            # الترجمة بتتحفظ في كاش الترجمة نفسه فالطلب الجاي بيلاقيها
+            update_model.context_aware_translate_batch(texts, batch_size=self.batch_size)
+        if questions:
+            print(f"✍️ تحسين {len(questions)} سؤال في الخلفية...")
+            if self._paraphraser is None:
+                self._paraphraser = update_model.get_paraphraser()
+            enhanced = update_model.enhance_batch(questions, self._paraphraser, batch_size=self.batch_size)
+            self._write_back(enhanced)
+
+    def _write_back(self, questions):
+        with open(self.updates_file, "a", encoding="utf-8") as f:
+            for q in questions:
+                f.write(dumps(q) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        with self._lock:
+            for q in questions:
+                self.bank.add(q)
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    def _send(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        service = self.server.service
+        url = urllib.parse.urlparse(self.path)
+        params = urllib.parse.parse_qs(url.query)
+        if url.path == "/index":
+            self._send(200, service.index())
+        elif url.path == "/pools":
+            self._send(200, service.pools())
+        elif url.path == "/question" and "id" in params:
+            q, status = service.question(_parse_id(params["id"][0]))
+            if q is not None:
+                self._send(200, q)
+            else:
+                self._send(202 if status == "pending" else 404, {"status": status})
+        elif url.path == "/translate" and "text" in params:
+            found, pending = service.translate(params["text"])
+            self._send(200 if not pending else 202, {"translations": found, "pending": pending})
+        elif url.path == "/health":
+            self._send(200, {"questions": len(service.bank), "pending": len(service.pending)})
+        else:
+            self._send(404, {"status": "not found"})
+
+    def do_POST(self):
+        if self.path != "/questions":
+            self._send(404, {"status": "not found"})
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        except ValueError:
+            self._send(400, {"status": "invalid json"})
+            return
+        questions = body if isinstance(body, list) else [body]
+        self._send(202, self.server.service.submit(questions))
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _parse_id(raw):
+    # الـ ids في البنك ممكن تبقى أرقام (ترتيب السؤال) أو نصوص
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return raw
+
+
+def serve(bank_file, host="127.0.0.1", port=DEFAULT_PORT, **kwargs):
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.service = QuizService(bank_file, **kwargs)
+    print(f"🚀 خدمة الأسئلة شغالة على http://{host}:{port} ({len(server.service.bank)} سؤال)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+# ---------- CLIENT ----------
+class QuizServiceClient:
+    """نفس واجهة QuestionBank اللي deploy.py محتاجها (by_category, category, get) بس من الخدمة."""
+
+    def __init__(self, url, timeout=2.0):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.by_category = self._get("/index")
+        self._questions = {}
+
+    def _get(self, path):
+        """الـ body لو 200 بس؛ 202 (لسه بيتحسن) أو 404 بيرجعوا None، وأي خطأ تاني OSError."""
+        try:
+            with urllib.request.urlopen(self.url + path, timeout=self.timeout) as response:
+                if response.status != 200:
+                    return None
+                return json.loads(response.read().decode("utf-8"))
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                return None
+            raise
+
+    def pools(self):
+        return {(category, level): ids for category, level, ids in self._get("/pools")}
+
+    def __len__(self):
+        return sum(len(ids) for ids in self.by_category.values())
+
+    def category(self, category_ar):
+        return self.by_category.get(category_ar, [])
+
+    def get(self, qid):
+        # الأسئلة مش بتتغير بعد ما تتحسن فبتتحفظ في الـ process
+        if qid in self._questions:
+            return self._questions[qid]
+        q = self._get("/question?id=" + urllib.parse.quote(json.dumps(qid)))
+        # زي QuestionBank.get: السؤال اللي مش موجود (أو لسه مش جاهز) KeyError
+        if q is None or "versions_ar" not in q:
+            raise KeyError(qid)
+        self._questions[qid] = q
+        return q
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="خدمة HTTP للأسئلة المحسنة")
+    parser.add_argument("bank", nargs="?", default="enhanced_questions.json",
+                        help="ملف البنك (.json أو .qstore)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--max-wait", type=float, default=0.5,
+                        help="أقصى انتظار بالثواني لتجميع دفعة")
+    args = parser.parse_args()
+    serve(args.bank, host=args.host, port=args.port, batch_size=args.batch_size, max_wait=args.max_wait)
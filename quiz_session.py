@@ -0,0 +1,172 @@
+import random
+import time
+
+# جلسة اختبار بتتكيف مع الطفل:
+#   - الأسئلة متقسمة مرة واحدة لكل process في سلال (الفئة، المستوى) — QuizPools
+#   - كل جلسة بتسحب من السلال من غير تكرار بـ Fisher-Yates كسول (dict صغير للتبديلات)
+#     فالسحب O(1) ومن غير ما ننسخ السلة لكل جلسة
+#   - مستوى السؤال الجاي من دقة الطفل (متوسط متحرك)، والصياغة بتلف على versions_ar
+# كل ضغطة زرار = عمليات ثابتة مهما كبر البنك أو عدد الجلسات.
+
+LEVELS = ("easy", "medium", "hard")
+
+
+def estimate_difficulty(question):
+    """difficulty لو موجود في السؤال (رقم أو اسم)، وإلا تقدير من طول السؤال."""
+    level = question.get("difficulty")
+    if isinstance(level, str) and level in LEVELS:
+        return LEVELS.index(level)
+    if isinstance(level, int):
+        return max(0, min(level, len(LEVELS) - 1))
+    words = len(str(question.get("question") or question["versions_ar"][0]).split())
+    return 0 if words <= 5 else 1 if words <= 8 else 2
+
+
+def build_pools(bank):
+    """{(category_ar, level): [ids]} من البنك كله."""
+    pools = {}
+    for category in bank.by_category:
+        for qid in bank.category(category):
+            level = estimate_difficulty(bank.get(qid))
+            pools.setdefault((category, level), []).append(qid)
+    return pools
+
+
+class QuizPools:
+    """السلال المشتركة بين كل الجلسات: pools[(category_ar, level)] = أرقام الأسئلة."""
+
+    def __init__(self, bank):
+        self.bank = bank
+        # QuizServiceClient بيجيب السلال جاهزة من الخدمة بدل طلب لكل سؤال
+        self.pools = bank.pools() if hasattr(bank, "pools") else build_pools(bank)
+
+    def pool(self, category, level):
+        return self.pools.get((category, level), ())
+
+    def size(self, category):
+        return len(self.bank.category(category))
+
+
+class QuizSession:
+
+    def __init__(self, pools, quotas, rng=None, alpha=0.3, initial_accuracy=0.7):
+        """quotas: عدد الأسئلة لكل فئة مثلاً {"فهـم": 10, "الاتجاهـ": 10}."""
+        self.pools = pools
+        self.quotas = dict(quotas)
+        self.rng = rng or random.Random()
+        self.alpha = alpha
+        self.initial_accuracy = initial_accuracy
+        # عدد مرات عرض كل سؤال (في كل المحاولات) عشان الصياغة ماتتكررش
+        self.seen = {}
+        self.reset()
+
+    # ---------- حالة المحاولة ----------
+    def reset(self):
+        """اختبار جديد من الأول بأسئلة جديدة."""
+        self._taken = {}
+        self._swaps = {}
+        # فئة فيها أسئلة أقل من المطلوب بتتعرض كلها بس
+        self._remaining = {c: min(k, self.pools.size(c)) for c, k in self.quotas.items()}
+        self._total = sum(self._remaining.values())
+        self.history = []
+        self._replay = None
+        self._start_attempt()
+        self.current = self._draw()
+
+    def retry(self):
+        """نفس الأسئلة بنفس الترتيب لكن بصياغة تانية."""
+        self._replay = list(self.history)
+        self._start_attempt()
+        self.current = self._replay[0] if self._replay else None
+        if self.current is not None:
+            self._mark_seen(self.current)
+
+    def _start_attempt(self):
+        self.index = 0
+        self.score = 0
+        self.accuracy = self.initial_accuracy
+        self.shown_at = time.monotonic()
+
+    @property
+    def total(self):
+        return len(self._replay) if self._replay is not None else self._total
+
+    @property
+    def finished(self):
+        return self.current is None
+
+    @property
+    def level(self):
+        return 0 if self.accuracy < 0.5 else 2 if self.accuracy > 0.85 else 1
+
+    # ---------- الضغطات ----------
+    def version(self, question):
+        """رقم الصياغة المعروضة دلوقتي من versions_ar: (مرات العرض - 1) بالدور."""
+        return (self.seen.get(self.current, 1) - 1) % len(question["versions_ar"])
+
+    def question_text(self, question):
+        return question["versions_ar"][self.version(question)]
+
+    def elapsed(self):
+        """الثواني من ساعة ما السؤال الحالي ظهر."""
+        return time.monotonic() - self.shown_at
+
+    def skip(self):
+        """السؤال الحالي مش متاح (اتشال من البنك): بيتشال من المحاولة من غير ما يتحسب."""
+        if self._replay is not None:
+            self.history.remove(self._replay.pop(self.index))
+            self.current = self._replay[self.index] if self.index < len(self._replay) else None
+            if self.current is not None:
+                self._mark_seen(self.current)
+        else:
+            self.history.remove(self.current)
+            self._total -= 1
+            self.current = self._draw()
+        self.shown_at = time.monotonic()
+
+    def answer(self, correct):
+        self.score += bool(correct)
+        self.accuracy += self.alpha * (float(bool(correct)) - self.accuracy)
+        self.index += 1
+        self.shown_at = time.monotonic()
+        if self._replay is not None:
+            self.current = self._replay[self.index] if self.index < len(self._replay) else None
+            if self.current is not None:
+                self._mark_seen(self.current)
+        else:
+            self.current = self._draw()
+        return correct
+
+    # ---------- السحب ----------
+    def _mark_seen(self, qid):
+        self.seen[qid] = self.seen.get(qid, 0) + 1
+
+    def _draw(self):
+        categories = [c for c, left in self._remaining.items() if left > 0]
+        while categories:
+            category = self.rng.choice(categories)
+            qid = self._draw_from(category)
+            if qid is not None:
+                self._remaining[category] -= 1
+                self.history.append(qid)
+                self._mark_seen(qid)
+                return qid
+            categories.remove(category)
+        return None
+
+    def _draw_from(self, category):
+        # المستوى المطلوب الأول وبعدين الأقرب له
+        target = self.level
+        for level in sorted(range(len(LEVELS)), key=lambda lv: abs(lv - target)):
+            pool = self.pools.pool(category, level)
+            key = (category, level)
+            taken = self._taken.get(key, 0)
+            if taken < len(pool):
+                # خطوة واحدة من Fisher-Yates على السلة من غير ما نغيرها
+                swaps = self._swaps.setdefault(key, {})
+                j = self.rng.randrange(taken, len(pool))
+                picked = swaps.get(j, j)
+                swaps[j] = swaps.get(taken, taken)
+                self._taken[key] = taken + 1
+                return pool[picked]
+        return None
@@ -0,0 +1,192 @@
+import argparse
+import atexit
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+
+# نتايج الأطفال (كل ضغطة إجابة) في SQLite:
+#   - record بيحط الحدث في buffer في الذاكرة وبس، فالضغطة مش بتستنى القرص
+#   - thread في الخلفية بيكتب الـ buffer في transaction واحدة لما يوصل flush_size أو كل flush_interval ثانية
+#   - مع كل كتابة بتتحدث جداول الإحصائيات (لكل سؤال، لكل فئة، لكل صياغة من versions_ar)
+#     فالاستعلام عن الدقة ووقت الإجابة بيقرا صفوف جاهزة بدل ما يلف على كل الإجابات
+
+DEFAULT_RESULTS_PATH = os.environ.get(
+    "QUIZ_RESULTS_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "quiz_results.sqlite3")
+)
+
+# عمود question من غير نوع عشان الـ id يرجع زي ما اتسجل (رقم أو نص)
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS answers ("
+    " id INTEGER PRIMARY KEY, session TEXT, question, category TEXT, version INTEGER,"
+    " correct INTEGER, seconds REAL, created REAL);"
+    "CREATE TABLE IF NOT EXISTS question_stats ("
+    " question PRIMARY KEY, category TEXT, attempts INTEGER, correct INTEGER, seconds REAL);"
+    "CREATE TABLE IF NOT EXISTS version_stats ("
+    " question, version INTEGER, attempts INTEGER, correct INTEGER, seconds REAL,"
+    " PRIMARY KEY (question, version));"
+    "CREATE TABLE IF NOT EXISTS category_stats ("
+    " category TEXT PRIMARY KEY, attempts INTEGER, correct INTEGER, seconds REAL);"
+)
+UPSERT = (
+    "INSERT INTO {table} VALUES ({values}) ON CONFLICT ({key}) DO UPDATE SET"
+    " attempts = attempts + excluded.attempts, correct = correct + excluded.correct,"
+    " seconds = seconds + excluded.seconds"
+)
+
+
+def _stats(attempts, correct, seconds):
+    return {
+        "attempts": attempts,
+        "accuracy": correct / attempts if attempts else 0.0,
+        "mean_seconds": seconds / attempts if attempts else 0.0,
+    }
+
+
+class ResultsStore:
+
+    def __init__(self, path=DEFAULT_RESULTS_PATH, flush_size=256, flush_interval=2.0):
+        self.path = path
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._buffer_lock = threading.Condition()
+        self._db_lock = threading.Lock()
+        self._closed = False
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._writer = threading.Thread(target=self._run_writer, daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    # ---------- التسجيل (من غير قرص) ----------
+    def record(self, session, question, category, version, correct, seconds):
+        with self._buffer_lock:
+            self._buffer.append((session, question, category, version, int(bool(correct)),
+                                 float(seconds), time.time()))
+            if len(self._buffer) >= self.flush_size:
+                self._buffer_lock.notify()
+
+    def _run_writer(self):
+        while True:
+            with self._buffer_lock:
+                if not self._closed and len(self._buffer) < self.flush_size:
+                    self._buffer_lock.wait(self.flush_interval)
+                if self._closed:
+                    return
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                print(f"⚠️ تعذر حفظ النتايج: {e}")
+
+    # ---------- الكتابة ----------
+    def flush(self):
+        """يكتب كل اللي في الـ buffer ويحدث الإحصائيات في transaction واحدة، ويرجع عدد الإجابات."""
+        with self._buffer_lock:
+            events, self._buffer = self._buffer, []
+        if not events:
+            return 0
+
+        questions = defaultdict(lambda: [0, 0, 0.0])
+        versions = defaultdict(lambda: [0, 0, 0.0])
+        categories = defaultdict(lambda: [0, 0, 0.0])
+        for _, question, category, version, correct, seconds, _ in events:
+            for totals in (questions[question, category], versions[question, version], categories[category]):
+                totals[0] += 1
+                totals[1] += correct
+                totals[2] += seconds
+
+        with self._db_lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO answers (session, question, category, version, correct, seconds, created)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)", events
+            )
+            self._conn.executemany(
+                UPSERT.format(table="question_stats", values="?, ?, ?, ?, ?", key="question"),
+                [key + tuple(totals) for key, totals in questions.items()]
+            )
+            self._conn.executemany(
+                UPSERT.format(table="version_stats", values="?, ?, ?, ?, ?", key="question, version"),
+                [key + tuple(totals) for key, totals in versions.items()]
+            )
+            self._conn.executemany(
+                UPSERT.format(table="category_stats", values="?, ?, ?, ?", key="category"),
+                [(key,) + tuple(totals) for key, totals in categories.items()]
+            )
+        return len(events)
+
+    # ---------- الإحصائيات ----------
+    def question_stats(self):
+        """{id: {"attempts", "accuracy", "mean_seconds", "category"}} لكل الأسئلة اللي اتجاوبت."""
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT question, category, attempts, correct, seconds FROM question_stats"
+            ).fetchall()
+        return {qid: dict(_stats(*totals), category=category) for qid, category, *totals in rows}
+
+    def category_stats(self):
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT category, attempts, correct, seconds FROM category_stats"
+            ).fetchall()
+        return {category: _stats(*totals) for category, *totals in rows}
+
+    def version_stats(self, question):
+        """{رقم الصياغة في versions_ar: الإحصائيات} لسؤال واحد."""
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT version, attempts, correct, seconds FROM version_stats WHERE question = ?", (question,)
+            ).fetchall()
+        return {version: _stats(*totals) for version, *totals in rows}
+
+    def weakest_versions(self, min_attempts=5, limit=20):
+        """الصياغات اللي الأطفال بيغلطوا فيها أكتر من صياغات نفس السؤال التانية (مرشحة لإعادة التوليد):
+        [(id، رقم الصياغة، دقتها، دقة السؤال كله، عدد المحاولات)]."""
+        with self._db_lock:
+            return self._conn.execute(
+                "SELECT v.question, v.version, 1.0 * v.correct / v.attempts AS accuracy,"
+                " 1.0 * q.correct / q.attempts, v.attempts"
+                " FROM version_stats v JOIN question_stats q ON q.question = v.question"
+                " WHERE v.attempts >= ?"
+                " ORDER BY accuracy - 1.0 * q.correct / q.attempts, accuracy LIMIT ?",
+                (min_attempts, limit)
+            ).fetchall()
+
+    def close(self):
+        with self._buffer_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._buffer_lock.notify()
+        self._writer.join()
+        self.flush()
+        with self._db_lock:
+            self._conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="إحصائيات إجابات الأطفال")
+    parser.add_argument("-d", "--db", default=DEFAULT_RESULTS_PATH)
+    parser.add_argument("--min-attempts", type=int, default=5)
+    parser.add_argument("-n", type=int, default=10, help="عدد الأسئلة والصياغات في التقرير")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"❌ مفيش نتايج في {args.db}")
+    else:
+        store = ResultsStore(args.db)
+        for category, s in sorted(store.category_stats().items(), key=lambda kv: str(kv[0])):
+            print(f"📂 {category}: {s['attempts']} إجابة، دقة {s['accuracy'] * 100:.0f}%، "
+                  f"{s['mean_seconds']:.1f} ثانية في المتوسط")
+        hardest = [(qid, s) for qid, s in store.question_stats().items() if s["attempts"] >= args.min_attempts]
+        print(f"\n❗ أصعب {args.n} أسئلة:")
+        for qid, s in sorted(hardest, key=lambda kv: kv[1]["accuracy"])[:args.n]:
+            print(f"  {qid}: دقة {s['accuracy'] * 100:.0f}% من {s['attempts']} ({s['mean_seconds']:.1f} ث)")
+        print("\n✍️ صياغات محتاجة تتولد تاني:")
+        for qid, version, accuracy, overall, attempts in store.weakest_versions(args.min_attempts, args.n):
+            print(f"  {qid} صياغة {version}: {accuracy * 100:.0f}% مقابل {overall * 100:.0f}% للسؤال ({attempts})")
+        store.close()
@@ -0,0 +1,152 @@
+import argparse
+import heapq
+import math
+import os
+import re
+import sqlite3
+import time
+from collections import Counter
+
+from extract import clean_arabic_text
+
+# فهرس بحث (BM25) على نص الكتاب المستخرج: النص بيتقسم فقرات، وكل كلمة ليها قائمة
+# بالفقرات اللي فيها وعدد مرات ظهورها، والكل محفوظ في SQLite فالبحث مش بيقرا الكتاب تاني.
+# الكلمات بتتوحد بنفس تنظيف extract.py (من غير تشكيل، ى→ي، ة→ه) في الفهرسة وفي البحث.
+
+DEFAULT_INDEX_PATH = "textbook_index.sqlite3"
+TOKEN = re.compile(r"\w+")
+# pdfplumber نادراً بيطلع سطور فاضية، فآخر الجملة بيقفل الفقرة برضه لو بقت min_words كلمة
+SENTENCE_END = (".", "؟", "?", "!", ":", "۔")
+
+
+def tokenize(text):
+    return TOKEN.findall(clean_arabic_text(text).lower())
+
+
+def iter_chunks(lines, max_words=120, min_words=None):
+    """فقرات (رقم أول سطر، النص): السطر الفاضي (ومنه آخر كل صفحة من extract.py) بيقفل الفقرة،
+    وكمان سطر آخره نهاية جملة لو الفقرة وصلت min_words، والفقرة الطويلة بتتقفل عند max_words."""
+    min_words = max_words // 3 if min_words is None else min_words
+    chunk, words, start = [], 0, 0
+    for n, line in enumerate(lines, 1):
+        line = line.strip()
+        if line:
+            if not chunk:
+                start = n
+            chunk.append(line)
+            words += len(line.split())
+        if chunk and (not line or words >= max_words
+                      or (words >= min_words and line.endswith(SENTENCE_END))):
+            yield start, " ".join(chunk)
+            chunk, words = [], 0
+    if chunk:
+        yield start, " ".join(chunk)
+
+
+class TextIndex:
+
+    def __init__(self, path=DEFAULT_INDEX_PATH, k1=1.5, b=0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._conn = sqlite3.connect(path)
+
+    def build(self, chunks):
+        """يبني الفهرس من الأول من (رقم السطر، النص)."""
+        conn = self._conn
+        with conn:
+            conn.executescript(
+                "DROP TABLE IF EXISTS chunks; DROP TABLE IF EXISTS postings;"
+                "DROP TABLE IF EXISTS terms; DROP TABLE IF EXISTS meta;"
+                "CREATE TABLE chunks (id INTEGER PRIMARY KEY, line INTEGER, length INTEGER, text TEXT);"
+                "CREATE TABLE postings (term TEXT, chunk INTEGER, tf INTEGER,"
+                " PRIMARY KEY (term, chunk)) WITHOUT ROWID;"
+                "CREATE TABLE terms (term TEXT PRIMARY KEY, df INTEGER) WITHOUT ROWID;"
+                "CREATE TABLE meta (key TEXT PRIMARY KEY, value REAL);"
+            )
+            df = Counter()
+            count = total_length = 0
+            for chunk_id, (line, text) in enumerate(chunks):
+                counts = Counter(tokenize(text))
+                length = sum(counts.values())
+                conn.execute("INSERT INTO chunks VALUES (?, ?, ?, ?)", (chunk_id, line, length, text))
+                conn.executemany("INSERT INTO postings VALUES (?, ?, ?)",
+                                 ((term, chunk_id, tf) for term, tf in counts.items()))
+                df.update(counts.keys())
+                count += 1
+                total_length += length
+            conn.executemany("INSERT INTO terms VALUES (?, ?)", df.items())
+            conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+                ("chunks", count), ("avg_length", total_length / count if count else 0.0)
+            ])
+        return count
+
+    def _meta(self):
+        return dict(self._conn.execute("SELECT key, value FROM meta"))
+
+    def search(self, query, k=5):
+        """أعلى k فقرات: [(الدرجة، رقم السطر، النص)]."""
+        meta = self._meta()
+        n, avg_length = meta.get("chunks", 0), meta.get("avg_length", 0) or 1.0
+        scores = Counter()
+        for term in set(tokenize(query)):
+            row = self._conn.execute("SELECT df FROM terms WHERE term = ?", (term,)).fetchone()
+            if not row:
+                continue
+            idf = math.log(1 + (n - row[0] + 0.5) / (row[0] + 0.5))
+            for chunk_id, tf, length in self._conn.execute(
+                "SELECT p.chunk, p.tf, c.length FROM postings p JOIN chunks c ON c.id = p.chunk"
+                " WHERE p.term = ?", (term,)
+            ):
+                norm = self.k1 * (1 - self.b + self.b * length / avg_length)
+                scores[chunk_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        results = []
+        for chunk_id, score in heapq.nlargest(k, scores.items(), key=lambda kv: kv[1]):
+            line, text = self._conn.execute(
+                "SELECT line, text FROM chunks WHERE id = ?", (chunk_id,)
+            ).fetchone()
+            results.append((score, line, text))
+        return results
+
+    def close(self):
+        self._conn.close()
+
+
+def build_index(text_file, index_path=DEFAULT_INDEX_PATH, max_words=120):
+    started = time.perf_counter()
+    index = TextIndex(index_path)
+    try:
+        with open(text_file, encoding="utf-8") as f:
+            count = index.build(iter_chunks(f, max_words=max_words))
+    finally:
+        index.close()
+    print(f"📚 تم فهرسة {count} فقرة في {time.perf_counter() - started:.1f} ثانية → {index_path}")
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="فهرس بحث على نص الكتاب المستخرج")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="فهرسة ملف نصي (ناتج extract.py)")
+    build.add_argument("text_file", nargs="?", default="extracted_text.txt")
+    build.add_argument("-i", "--index", default=DEFAULT_INDEX_PATH)
+    build.add_argument("--max-words", type=int, default=120, help="أقصى طول للفقرة بالكلمات")
+    query = sub.add_parser("query", help="البحث عن كلمة أو جملة")
+    query.add_argument("query")
+    query.add_argument("-i", "--index", default=DEFAULT_INDEX_PATH)
+    query.add_argument("-k", type=int, default=5, help="عدد النتايج")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        build_index(args.text_file, args.index, max_words=args.max_words)
+    elif not os.path.exists(args.index):
+        print(f"❌ الفهرس {args.index} مش موجود، شغل build الأول")
+    else:
+        index = TextIndex(args.index)
+        started = time.perf_counter()
+        results = index.search(args.query, k=args.k)
+        print(f"🔎 {len(results)} نتيجة في {(time.perf_counter() - started) * 1000:.1f} ms")
+        for score, line, text in results:
+            print(f"\n[{score:.2f}] سطر {line}:\n{text}")
+        index.close()
@@ -0,0 +1,154 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+# كاش الترجمة المشترك بين كل السكربتات (qiz_app, update_model, app)
+DEFAULT_CACHE_PATH = os.environ.get(
+    "TRANSLATION_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "translation_cache.sqlite3")
+)
+
+
+class TranslationCache:
+    """كاش ترجمة على القرص (SQLite) وقدامه LRU محدود في الذاكرة.
+
+    المفتاح هو (النص، لغة المصدر، لغة الهدف، الـ backend) فنفس النص
+    بموديلين مختلفين ليه مدخلين منفصلين.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_memory_items=10000):
+        self.path = path
+        self.max_memory_items = max_memory_items
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        # WAL و timeout عشان كذا process (run_sharded) بتقرا وتكتب في نفس الملف
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            " key TEXT PRIMARY KEY,"
+            " backend TEXT NOT NULL,"
+            " src_lang TEXT NOT NULL,"
+            " tgt_lang TEXT NOT NULL,"
+            " source TEXT NOT NULL,"
+            " translation TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS translations_backend ON translations (backend)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(text, src_lang, tgt_lang, backend):
+        raw = "\x1f".join((backend, src_lang, tgt_lang, text))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _remember(self, key, backend, translation):
+        self._memory[key] = (backend, translation)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def get(self, text, src_lang, tgt_lang, backend):
+        return self.get_many([text], src_lang, tgt_lang, backend).get(text)
+
+    def get_many(self, texts, src_lang, tgt_lang, backend):
+        """يرجع dict فيه النصوص الموجودة في الكاش بس."""
+        found = {}
+        with self._lock:
+            missing = {}
+            for text in dict.fromkeys(texts):
+                key = self.make_key(text, src_lang, tgt_lang, backend)
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[text] = self._memory[key][1]
+                else:
+                    missing[key] = text
+            hits_in_memory = len(found)
+
+            keys = list(missing)
+            # SQLite بيحدد عدد المتغيرات في الاستعلام الواحد
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, translation FROM translations WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                for key, translation in rows:
+                    found[missing[key]] = translation
+                    self._remember(key, backend, translation)
+
+            self.hits += len(found)
+            self.misses += len(missing) - (len(found) - hits_in_memory)
+        return found
+
+    def put(self, text, translation, src_lang, tgt_lang, backend):
+        self.put_many({text: translation}, src_lang, tgt_lang, backend)
+
+    def put_many(self, translations, src_lang, tgt_lang, backend):
+        rows = []
+        with self._lock:
+            for text, translation in translations.items():
+                key = self.make_key(text, src_lang, tgt_lang, backend)
+                self._remember(key, backend, translation)
+                rows.append((key, backend, src_lang, tgt_lang, text, translation))
+            self._conn.executemany("INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self._conn.commit()
+
+    def invalidate(self, backend=None):
+        """مسح مدخلات backend معين (أو الكاش كله لو backend=None)، ويرجع عدد الصفوف الممسوحة."""
+        with self._lock:
+            if backend is None:
+                deleted = self._conn.execute("DELETE FROM translations").rowcount
+            else:
+                deleted = self._conn.execute("DELETE FROM translations WHERE backend = ?", (backend,)).rowcount
+            self._conn.commit()
+            for key in [k for k, (b, _) in self._memory.items() if backend is None or b == backend]:
+                del self._memory[key]
+        return deleted
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "memory_items": len(self._memory),
+        }
+
+    def counts_by_backend(self):
+        with self._lock:
+            return dict(self._conn.execute(
+                "SELECT backend, COUNT(*) FROM translations GROUP BY backend"
+            ).fetchall())
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def get_cache():
+    """الكاش المشترك للعملية كلها (بيتفتح أول مرة بس)."""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = TranslationCache()
+        return _shared_cache
+
+
+if __name__ == "__main__":
+    import sys
+
+    cache = get_cache()
+    if len(sys.argv) > 2 and sys.argv[1] == "invalidate":
+        print(f"🧹 تم مسح {cache.invalidate(sys.argv[2])} ترجمة من {sys.argv[2]}")
+    else:
+        for backend, count in cache.counts_by_backend().items():
+            print(f"• {backend}: {count}")
@@ -0,0 +1,140 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from translation_cache import get_cache
+from instrumentation import metrics
+
+# تنفيذ الترجمة بالتوازي: عدد workers محدود، rate limiter (token bucket)،
+# إعادة محاولة مع backoff، وإعادة استخدام الـ client بدل ما نعمل واحد جديد لكل نص
+
+
+class TokenBucket:
+    """بيسمح بـ rate طلب في الثانية في المتوسط، ولحد burst طلب مرة واحدة."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if not self.rate:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class DeepTranslatorBackend:
+    name = "google:deep_translator"
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def translate(self, text, src, tgt):
+        # client واحد لكل thread ولكل زوج لغات
+        clients = self._local.__dict__.setdefault("clients", {})
+        if (src, tgt) not in clients:
+            from deep_translator import GoogleTranslator
+            clients[(src, tgt)] = GoogleTranslator(source=src, target=tgt)
+        return clients[(src, tgt)].translate(text)
+
+
+class GoogletransBackend:
+    name = "googletrans"
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def translate(self, text, src, tgt):
+        if not hasattr(self._local, "client"):
+            from googletrans import Translator
+            self._local.client = Translator()
+        return self._local.client.translate(text, src=src, dest=tgt).text
+
+
+class StubBackend:
+    """backend محلي للتجارب من غير نت: بيرجع النص بعلامة اللغة."""
+
+    name = "stub"
+
+    def __init__(self, latency=0.0, failure_rate=0.0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+
+    def translate(self, text, src, tgt):
+        if self.latency:
+            time.sleep(self.latency)
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise RuntimeError("stub translation failure")
+        return f"[{tgt}] {text}"
+
+
+BACKENDS = {
+    "google": DeepTranslatorBackend,
+    "googletrans": GoogletransBackend,
+    "stub": StubBackend,
+}
+
+
+def make_backend(name=None):
+    """اختيار الـ backend بالاسم، أو من متغير البيئة TRANSLATION_BACKEND."""
+    return BACKENDS[name or os.environ.get("TRANSLATION_BACKEND", "google")]()
+
+
+class TranslationExecutor:
+
+    def __init__(self, backend, max_workers=4, rate=5.0, burst=None, retries=3, backoff=0.5,
+                 use_cache=True):
+        self.backend = backend
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self.bucket = TokenBucket(rate, burst)
+        self.cache = get_cache() if use_cache else None
+        self.pool = ThreadPoolExecutor(max_workers=max_workers)
+        self.failures = 0
+
+    def _translate_with_retry(self, text, src, tgt):
+        for attempt in range(self.retries + 1):
+            self.bucket.acquire()
+            try:
+                return self.backend.translate(text, src, tgt)
+            except Exception as e:
+                if attempt == self.retries:
+                    print(f"⚠️ خطأ في الترجمة بعد {attempt + 1} محاولات: {e}")
+                    metrics.count("translate_error")
+                    return None
+                metrics.count("translate_retry")
+                time.sleep(self.backoff * (2 ** attempt) + random.uniform(0, self.backoff))
+
+    def translate(self, text, src='auto', tgt='ar'):
+        return self.translate_many([text], src, tgt)[0]
+
+    def translate_many(self, texts, src='auto', tgt='ar'):
+        """ترجمة قائمة نصوص بالتوازي؛ النص اللي فشلت ترجمته (أو مش نص أصلاً زي None) بيرجع زي ما هو."""
+        strings = [t for t in texts if isinstance(t, str)]
+        found = self.cache.get_many(strings, src, tgt, self.backend.name) if self.cache else {}
+        missing = [t for t in dict.fromkeys(strings) if t not in found]
+
+        results = self.pool.map(lambda t: self._translate_with_retry(t, src, tgt), missing)
+        fresh = {t: r for t, r in zip(missing, results) if r is not None}
+        self.failures += len(missing) - len(fresh)
+        if self.cache and fresh:
+            self.cache.put_many(fresh, src, tgt, self.backend.name)
+        found.update(fresh)
+        return [found.get(t, t) for t in texts]
+
+    def close(self):
+        self.pool.shutdown(wait=True)
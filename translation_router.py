@@ -0,0 +1,171 @@
+import os
+import re
+from collections import Counter, defaultdict
+
+from instrumentation import metrics
+from question_io import ARABIC, load_questions
+from translation_cache import get_cache
+
+# موجه ترجمة: كل نص بيروح لأرخص طريقة تقدر تترجمه بالترتيب ده:
+#   1. جدول الحروف / القاموس الثابت / قاموس الكلمات من بنك متترجم قبل كده (من غير أي موديل)
+#   2. كاش الترجمة (من أي backend اترجم بيه قبل كده)
+#   3. NLLB المحلي على دفعات
+#   4. الخدمة البعيدة (جوجل) لو متفعلة بس، للجمل الطويلة
+# الحروف والأرقام ماتروحش لموديل خالص، والكلمات الواحدة عمرها ما بتروح للخدمة البعيدة
+# وبتترجم جوه نفس الدفعة مع باقي النصوص القصيرة. الكلمة الواحدة بتروح لـ NLLB بس لو مش في
+# القاموس ولا في الكاش (عداد route_word_local)، يعني كلمة أول مرة تظهر في البنك.
+
+# الفئات لازم تفضل بنفس الكتابة اللي deploy.py بيفلتر بيها
+DEFAULT_GLOSSARY = {
+    "Letters": "حروف",
+    "Words": "كلمات",
+    "Sentences": "جُمل",
+    "Comprehension": "فهـم",
+    "Math": "الرياضيات",
+    "Time & Place": "الوقت والمكان",
+    "Spatial Awareness": "الوعي المكاني",
+    "Directionality": "الاتجاهـ",
+    "Left": "يسار",
+    "Right": "يمين",
+    "Up": "فوق",
+    "Down": "تحت",
+    "North": "شمال",
+    "South": "جنوب",
+    "East": "شرق",
+    "West": "غرب",
+    "Front": "قدام",
+    "Back": "ورا",
+    "Inside": "جوه",
+    "Outside": "بره",
+}
+
+# قاموس الكلمات: الاختيارات والإجابات اللي كلمة واحدة وترجمتها اللي في نفس مكانها في choices_ar
+DEFAULT_GLOSSARY_BANK = os.environ.get(
+    "TRANSLATION_GLOSSARY_BANK",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "enhanced_questions.json")
+)
+
+NUMBER = re.compile(r"[\d\s.,:/+\-×÷=%]+")
+
+
+def glossary_from_bank(path=DEFAULT_GLOSSARY_BANK):
+    """{كلمة: ترجمة} من بنك اتترجم قبل كده، والترجمة الأكتر تكرار لو الكلمة ليها أكتر من شكل.
+    الترجمات اللي مفيهاش عربي (fallback للنص الإنجليزي) مش بتدخل."""
+    try:
+        questions = load_questions(path)
+    except (OSError, ValueError):
+        return {}
+    seen = defaultdict(Counter)
+    for item in questions:
+        pairs = list(zip(item.get("choices") or [], item.get("choices_ar") or []))
+        pairs.append((item.get("answer"), item.get("answer_ar")))
+        for text, translation in pairs:
+            if (isinstance(text, str) and isinstance(translation, str)
+                    and len(text.split()) == 1 and ARABIC.search(translation)):
+                seen[text.strip().lower()][translation.strip()] += 1
+    return {word: counts.most_common(1)[0][0] for word, counts in seen.items()}
+
+
+def default_glossary(bank_file=DEFAULT_GLOSSARY_BANK):
+    """قاموس الكلمات من البنك، والقاموس الثابت فوقه (الفئات لازم تفضل بالكتابة بتاعته)."""
+    glossary = glossary_from_bank(bank_file)
+    glossary.update((k.lower(), v) for k, v in DEFAULT_GLOSSARY.items())
+    return glossary
+
+
+def remote_from_env():
+    """الخدمة البعيدة بتشتغل بس لو TRANSLATION_REMOTE متحدد (اسم backend زي google أو googletrans)."""
+    name = os.environ.get("TRANSLATION_REMOTE")
+    if not name:
+        return None
+    from translation_executor import TranslationExecutor, make_backend
+    return TranslationExecutor(make_backend(name))
+
+
+class TranslationRouter:
+
+    def __init__(self, classify, letter_map, local, local_backend_id, remote=None,
+                 glossary=None, max_local_words=25, src_lang="eng_Latn", tgt_lang="arb_Arab",
+                 remote_src="en", remote_tgt="ar"):
+        """classify: classify_text، local(texts, batch_size, check_cache) بترجع ترجمة مجمعة
+        (smart_translate_batch)، remote: TranslationExecutor أو None."""
+        self.classify = classify
+        self.letter_map = letter_map
+        self.local = local
+        self.local_backend_id = local_backend_id
+        self.remote = remote
+        glossary = default_glossary() if glossary is None else glossary
+        self.glossary = {k.lower(): v for k, v in glossary.items()}
+        self.max_local_words = max_local_words
+        self.src_lang, self.tgt_lang = src_lang, tgt_lang
+        self.remote_src, self.remote_tgt = remote_src, remote_tgt
+        self.cache = get_cache()
+
+    def _static(self, text):
+        stripped = text.strip()
+        if self.classify(text) == "letter":
+            return self.letter_map.get(stripped.upper(), text)
+        if NUMBER.fullmatch(stripped):
+            return text
+        return self.glossary.get(stripped.lower())
+
+    def _cached(self, texts):
+        # الكاش: ترجمة NLLB الأول، وبعدها ترجمة الخدمة البعيدة لو فيه
+        found = self.cache.get_many(texts, self.src_lang, self.tgt_lang, self.local_backend_id)
+        if self.remote:
+            missing = [t for t in texts if t not in found]
+            found.update(self.cache.get_many(missing, self.remote_src, self.remote_tgt, self.remote.backend.name))
+        return found
+
+    def lookup(self, texts):
+        """اللي يتترجم فوراً من غير أي موديل (جدول/قاموس/كاش) كـ dict؛ الباقي مش موجود فيه."""
+        found, rest = {}, []
+        for text in dict.fromkeys(texts):
+            static = self._static(text)
+            if static is not None:
+                found[text] = static
+            else:
+                rest.append(text)
+        found.update(self._cached(rest))
+        return found
+
+    def translate_batch(self, texts, batch_size=16):
+        results = list(texts)
+        pending = {}
+        with metrics.stage("classify", items=len(texts)):
+            for i, text in enumerate(texts):
+                static = self._static(text)
+                if static is not None:
+                    results[i] = static
+                    metrics.count("route_static")
+                else:
+                    pending.setdefault(text, []).append(i)
+        if not pending:
+            return results
+
+        unique = list(pending)
+        found = self._cached(unique)
+        metrics.count("route_cache", len(found))
+
+        local_texts, remote_texts = [], []
+        for text in unique:
+            if text in found:
+                continue
+            long_sentence = len(text.split()) > self.max_local_words
+            (remote_texts if self.remote and long_sentence else local_texts).append(text)
+            if self.classify(text) == "word":
+                metrics.count("route_word_local")
+
+        if local_texts:
+            metrics.count("route_local", len(local_texts))
+            # الكاش اتشاف فوق فالـ local مش بيدور فيه تاني (وإلا كل نص جديد يتحسب miss مرتين)
+            translations = self.local(local_texts, batch_size=batch_size, check_cache=False)
+            found.update(zip(local_texts, translations))
+        if remote_texts:
+            metrics.count("route_remote", len(remote_texts))
+            found.update(zip(remote_texts, self.remote.translate_many(remote_texts, self.remote_src, self.remote_tgt)))
+
+        for text, indexes in pending.items():
+            for i in indexes:
+                results[i] = found[text]
+        return results
@@ -1,41 +1,84 @@
-from transformers import pipeline, AutoTokenizer, AutoModelForSeq2SeqLM
-import json
 import re
 import os
+from translation_cache import get_cache
+from enhance_stream import run_enhancement, run_sharded
+from paraphrase_engine import paraphrase_questions
+from arabic_rewrite import RewriteEngine
+from model_registry import configure, get_pipeline, get_seq2seq, print_report
+from instrumentation import metrics, profiled
+from translation_router import TranslationRouter, remote_from_env
 os.environ['HF_HOME'] = 'D:/huggingface_cache'
 
 
 # تحميل نموذج إعادة الصياغة
 def get_paraphraser():
     try:
-        return pipeline(
+        return get_pipeline(
             "text2text-generation",
-            model="humarin/chatgpt_paraphraser_on_T5_base",
-            device=0,
+            "humarin/chatgpt_paraphraser_on_T5_base",
             max_length=60
         )
     except Exception as e:
         print(f"⚠️ خطأ في تحميل نموذج إعادة الصياغة: {e}")
+        metrics.count("model_load_error")
         return None
 
-# تحميل نموذج الترجمة السياقية (NLLB)
+# نموذج الترجمة السياقية (NLLB) بيتحمل من السجل أول مرة نحتاجه بس
 nllb_model_name = "facebook/nllb-200-distilled-600M"
-nllb_tokenizer = AutoTokenizer.from_pretrained(nllb_model_name)
-nllb_model = AutoModelForSeq2SeqLM.from_pretrained(nllb_model_name)
+nllb_backend_id = f"nllb:{nllb_model_name}"
 
 # ترجمة ذكية باستخدام NLLB
 def smart_translate(text, src_lang="eng_Latn", tgt_lang="arb_Arab"):
-    try:
-        inputs = nllb_tokenizer(text, return_tensors="pt", src_lang=src_lang)
-        translated_tokens = nllb_model.generate(
-            **inputs,
-            forced_bos_token_id=nllb_tokenizer.lang_code_to_id[tgt_lang],
-            max_length=60
-        )
-        return nllb_tokenizer.batch_decode(translated_tokens, skip_special_tokens=True)[0]
-    except Exception as e:
-        print(f"⚠️ خطأ في NLLB: {e}")
-        return text
+    return smart_translate_batch([text], src_lang=src_lang, tgt_lang=tgt_lang, batch_size=1)[0]
+
+# ترجمة مجمعة: تقسيم النصوص حسب الطول وتشغيل generate مرة لكل دفعة بدل مرة لكل نص
+# check_cache=False لما اللي بينادي (الموجه) دور في الكاش قبل كده، والترجمات الجديدة بتتحفظ برضه
+def smart_translate_batch(texts, src_lang="eng_Latn", tgt_lang="arb_Arab", batch_size=16, max_length=60,
+                          check_cache=True):
+    results = list(texts)
+    if not texts:
+        return results
+
+    # اللي اتترجم قبل كده (في أي تشغيل سابق) بيترجع من الكاش
+    cache = get_cache()
+    translated = cache.get_many(texts, src_lang, tgt_lang, nllb_backend_id) if check_cache else {}
+    # النصوص المكررة تترجم مرة واحدة فقط
+    unique_texts = [t for t in dict.fromkeys(texts) if t not in translated]
+    if not unique_texts:
+        return [translated[t] for t in texts]
+
+    nllb_tokenizer, nllb_model = get_seq2seq(nllb_model_name)
+    nllb_tokenizer.src_lang = src_lang
+    lengths = {t: len(nllb_tokenizer(t)["input_ids"]) for t in unique_texts}
+    # الترتيب حسب الطول يخلي كل دفعة فيها نصوص متقاربة فيقل الـ padding
+    ordered = sorted(unique_texts, key=lambda t: lengths[t])
+
+    for start in range(0, len(ordered), batch_size):
+        bucket = ordered[start:start + batch_size]
+        try:
+            inputs = nllb_tokenizer(bucket, return_tensors="pt", padding=True)
+            inputs = {k: v.to(nllb_model.device) if hasattr(v, "to") else v for k, v in inputs.items()}
+            translated_tokens = nllb_model.generate(
+                **inputs,
+                forced_bos_token_id=nllb_tokenizer.lang_code_to_id[tgt_lang],
+                max_length=max_length
+            )
+            outputs = nllb_tokenizer.batch_decode(translated_tokens, skip_special_tokens=True)
+        except Exception as e:
+            print(f"⚠️ خطأ في NLLB: {e}")
+            metrics.count("translate_error")
+            metrics.count("translate_fallback", len(bucket))
+            translated.update((t, t) for t in bucket)
+            continue
+        translated.update(zip(bucket, outputs))
+        # لو الكاش مش متاح (مثلاً مقفول من process تانية) الترجمة نفسها ماتضيعش
+        try:
+            cache.put_many(dict(zip(bucket, outputs)), src_lang, tgt_lang, nllb_backend_id)
+        except Exception as e:
+            print(f"⚠️ تعذر حفظ الترجمة في الكاش: {e}")
+            metrics.count("cache_write_error")
+
+    return [translated[t] for t in texts]
 
 # تصنيف النص
 def classify_text(text):
@@ -47,22 +90,38 @@ def classify_text(text):
         return "sentence"
 
 # ترجمة ذكية بناءً على نوع النص
+LETTER_MAP = {
+    "A": "أ", "B": "ب", "C": "ج", "D": "د", "E": "هـ",
+    "F": "ف", "G": "ج", "H": "هـ", "I": "ي", "J": "ج",
+    "K": "ك", "L": "ل", "M": "م", "N": "ن", "O": "و",
+    "P": "ب", "Q": "ق", "R": "ر", "S": "س", "T": "ت",
+    "U": "ع", "V": "ف", "W": "و", "X": "إكس", "Y": "ي", "Z": "ز"
+}
+
 def context_aware_translate(text):
-    text_type = classify_text(text)
-    if text_type == "letter":
-        return {
-            "A": "أ", "B": "ب", "C": "ج", "D": "د", "E": "هـ",
-            "F": "ف", "G": "ج", "H": "هـ", "I": "ي", "J": "ج",
-            "K": "ك", "L": "ل", "M": "م", "N": "ن", "O": "و",
-            "P": "ب", "Q": "ق", "R": "ر", "S": "س", "T": "ت",
-            "U": "ع", "V": "ف", "W": "و", "X": "إكس", "Y": "ي", "Z": "ز"
-        }.get(text.upper(), text)
-    else:
-        return smart_translate(text)
+    return context_aware_translate_batch([text])[0]
+
+# الموجه بيتعمل مرة واحدة: جدول/قاموس ← كاش ← NLLB على دفعات ← خدمة بعيدة لو متفعلة
+_router = []
+
+def get_router():
+    if not _router:
+        _router.append(TranslationRouter(
+            classify_text, LETTER_MAP,
+            local=smart_translate_batch,
+            local_backend_id=nllb_backend_id,
+            remote=remote_from_env()
+        ))
+    return _router[0]
+
+# نفس منطق context_aware_translate لكن لقائمة نصوص: كل نص بيروح لأرخص طريقة تترجمه
+def context_aware_translate_batch(texts, batch_size=16):
+    return get_router().translate_batch(texts, batch_size=batch_size)
 
 # تبسيط لغوي للأطفال
-def simplify_for_children(text):
-    simplifications = {
+# كل القواعد بتتطبق في لفة واحدة، والأطول بيكسب ("الطفلة" قبل "الطفل")
+SIMPLIFIER = RewriteEngine(
+    {
         "التي": "اللي",
         "تستطيع": "تقدر",
         "يستطيع": "يقدر",
@@ -75,71 +134,112 @@ def simplify_for_children(text):
         "أي": "إيه",
         "ما هي": "إيه هي",
         "ما هو": "إيه هو"
-    }
-    for k, v in simplifications.items():
-        text = text.replace(k, v)
-    return text
+    },
+    # دي تتغير لو كلمة لوحدها بس (عشان "رأي" و"كما هو")
+    whole_word={"أي", "ما هي", "ما هو"}
+)
+
+def simplify_for_children(text):
+    return SIMPLIFIER.apply(text)
 
 # إعادة صياغة السؤال
 def paraphrase_question(paraphraser, question, num_versions=3):
-    if not paraphraser:
-        return [question] * (num_versions + 1)
-    versions = [question]
-    try:
-        paraphrases = paraphraser(
-            f"paraphrase: {question}",
-            num_return_sequences=min(num_versions * 2, 5),
-            num_beams=5,
-            temperature=0.7,
-            repetition_penalty=2.5
-        )
-        unique_paraphrases = set()
-        for p in paraphrases:
-            text = p['generated_text'].strip()
-            if (
-                text.lower() != question.lower() and
-                len(text.split()) > 3 and
-                '?' in text
-            ):
-                unique_paraphrases.add(text)
-        versions.extend(list(unique_paraphrases)[:num_versions])
-        return versions
-    except Exception as e:
-        print(f"⚠️ خطأ في إعادة الصياغة: {e}")
-        return [question] * (num_versions + 1)
+    return paraphrase_questions(paraphraser, [question], num_versions=num_versions)[0]
 
-# المعالجة الكاملة
-def enhance_question_quality(input_file, output_file):
-    try:
-        with open(input_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+# نصوص السؤال اللي بتتترجم بالترتيب: الصياغات، الاختيارات، الإجابة، الفئة
+def collect_texts(items, suffix=""):
+    texts = []
+    for item in items:
+        texts.extend(item['versions' + suffix])
+        texts.extend(item['choices' + suffix])
+        texts.append(item['answer' + suffix])
+        texts.append(item['category' + suffix] or "عام")
+    return texts
+
+def assign_translations(items, translated):
+    translated = iter(translated)
+    for item in items:
+        item['versions_ar'] = [next(translated) for _ in item['versions']]
+        item['choices_ar'] = [next(translated) for _ in item['choices']]
+        item['answer_ar'] = next(translated)
+        item['category_ar'] = next(translated)
+    return items
 
-        paraphraser_model = get_paraphraser()
+# مراحل التحسين (كل واحدة بتاخد دفعة وترجعها)، enhance_batch بتشغلهم ورا بعض
+# و enhance_question_quality(pipelined=True) بتشغلهم مع بعض على دفعات مختلفة
+def paraphrase_stage(items, paraphraser, batch_size=16):
+    print(f"✍️ جاري إعادة صياغة {len(items)} سؤال على دفعات ({batch_size})...")
+    with metrics.stage("paraphrase", items=len(items)):
+        all_versions = paraphrase_questions(
+            paraphraser, [item['question'] for item in items], batch_size=batch_size
+        )
+    for item, versions in zip(items, all_versions):
+        item['versions'] = versions
+    return items
 
-        for i, item in enumerate(data):
-            item['versions'] = paraphrase_question(paraphraser_model, item['question'])
+def translate_stage(items, batch_size=16):
+    texts = collect_texts(items)
+    print(f"🌐 جاري ترجمة {len(texts)} نص على دفعات ({batch_size})...")
+    with metrics.stage("translate", items=len(texts)):
+        return assign_translations(items, context_aware_translate_batch(texts, batch_size=batch_size))
 
-            item['versions_ar'] = [
-                simplify_for_children(context_aware_translate(v))
-                for v in item['versions']
-            ]
+def simplify_stage(items):
+    texts = collect_texts(items, "_ar")
+    with metrics.stage("simplify", items=len(texts)):
+        return assign_translations(items, SIMPLIFIER.apply_batch(texts))
 
-            item['choices_ar'] = [
-                simplify_for_children(context_aware_translate(c))
-                for c in item['choices']
-            ]
+# تحسين دفعة من الأسئلة: إعادة صياغة مجمعة ثم ترجمة كل نصوص الدفعة مرة واحدة
+def enhance_batch(items, paraphraser, batch_size=16):
+    items = paraphrase_stage(items, paraphraser, batch_size=batch_size)
+    items = translate_stage(items, batch_size=batch_size)
+    return simplify_stage(items)
 
-            item['answer_ar'] = simplify_for_children(context_aware_translate(item['answer']))
+# المعالجة الكاملة
+# pipelined=True: الصياغة والترجمة والتبسيط كل واحدة في thread وبينهم طوابير محدودة
+# workers > 1: الأسئلة بتتقسم على processes (كل واحدة بموديلاتها) وبعدين تتدمج بنفس الترتيب
+def enhance_question_quality(input_file, output_file, batch_size=16, incremental=False,
+                             chunk_size=64, checkpoint_file=None, profile=None,
+                             pipelined=False, translate_workers=1,
+                             workers=1, threads_per_worker=None, index_range=None, previous_file=None):
+    if workers > 1:
+        try:
+            run_sharded(
+                input_file, output_file, enhance_shard, workers, threads_per_worker,
+                previous_file=output_file, batch_size=batch_size, chunk_size=chunk_size,
+                incremental=incremental, pipelined=pipelined, translate_workers=translate_workers
+            )
+            print(f"🎉 تم دمج الـ shards في: {output_file}")
+            return True
+        except Exception as e:
+            print(f"❌ خطأ أثناء المعالجة: {e}")
+            return False
 
-            item['category_ar'] = simplify_for_children(context_aware_translate(
-                item['category'] if item['category'] else "عام"
-            ))
+    metrics.reset()
+    cache_start = get_cache().stats()
+    try:
+        # الموديل بيتحمل أول ما نحتاجه بس (ممكن كل الأسئلة تكون متعاد استخدامها)
+        paraphraser = []
 
-            print(f"✅ تم تحسين السؤال {i+1}/{len(data)}")
+        def paraphrase_chunk(items):
+            if not paraphraser:
+                paraphraser.append(get_paraphraser())
+            return paraphrase_stage(items, paraphraser[0], batch_size=batch_size)
 
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        stages = [
+            ("paraphrase", paraphrase_chunk, 1),
+            ("translate", lambda items: translate_stage(items, batch_size=batch_size), translate_workers),
+            ("simplify", simplify_stage, 1),
+        ]
+        with profiled(profile):
+            run_enhancement(
+                input_file, output_file, stages=stages, pipelined=pipelined,
+                chunk_size=chunk_size, checkpoint_file=checkpoint_file, incremental=incremental,
+                index_range=index_range, previous_file=previous_file
+            )
 
+        metrics.record_cache("الترجمة", get_cache().stats(), since=cache_start)
+        metrics.print_summary()
+        print_report()
         print(f"🎉 تم حفظ النتائج في: {output_file}")
         return True
 
@@ -147,8 +247,13 @@ def enhance_question_quality(input_file, output_file):
         print(f"❌ خطأ أثناء المعالجة: {e}")
         return False
 
+# worker لوضع الـ shards: process جديدة بتحمل الموديلات مرة واحدة بعدد threads محدد
+def enhance_shard(input_file, shard_file, index_range, num_threads, **kwargs):
+    configure(num_threads=num_threads)
+    return enhance_question_quality(input_file, shard_file, index_range=index_range, **kwargs)
+
 # التشغيل
 if __name__ == "__main__":
     input_path = "D:\\company\\En_questions.json"
     output_path = "D:\\company\\enhanced_questions_final.json"
-    enhance_question_quality(input_path, output_path)
+    enhance_question_quality(input_path, output_path, incremental=True)
@@ -0,0 +1,154 @@
+import argparse
+import json
+import os
+import re
+from collections import Counter
+
+from question_io import ARABIC, load_questions, write_questions
+
+# خطوة قبل النشر: كل سؤال بياخد answer_index (رقم الإجابة الصحيحة في choices و choices_ar)
+# فـ deploy.py بيقارن أرقام بدل ما يقارن نص answer_ar بالاختيار المترجم (الاتنين بيتترجموا
+# لوحدهم وممكن يختلفوا). وفي نفس اللفة البنك كله بيتفحص ويتكتب تقرير JSON بالمشاكل:
+#   errors    السؤال مايتعرضش: إجابة مش متحددة، answer_ar مش نفس الاختيار، اختيارات ناقصة/فاضية/مكررة
+#   warnings  صياغة فاضية أو مش مترجمة (إنجليزي في versions_ar) أو فيها بقايا prompt الترجمة
+# الإجابة بتتحدد من الإنجليزي الأول (answer في choices) لأنه الأصل، والعربي لو مفيش إنجليزي.
+
+ERRORS = (
+    "answer_unresolved", "answer_mismatch", "choices_length_mismatch", "empty_choice", "duplicate_choices"
+)
+WARNINGS = ("empty_versions", "empty_version", "untranslated_version", "prompt_leak")
+LATIN = re.compile(r"[A-Za-z]")
+# بقايا prompt الترجمة اللي ظهرت في error.json ("في سياق التعليم ، ترجمة: ...")
+PROMPT_LEAKS = ("ترجمة:", "سياق التعليم")
+
+
+def resolve_answer_index(item):
+    """رقم الإجابة الصحيحة في choices (أو choices_ar)، أو None لو مش لاقيها."""
+    index = item.get("answer_index")
+    if isinstance(index, int) and 0 <= index < len(item.get("choices") or item.get("choices_ar") or ()):
+        return index
+    for answer_key, choices_key in (("answer", "choices"), ("answer_ar", "choices_ar")):
+        choices = item.get(choices_key) or []
+        if item.get(answer_key) in choices:
+            return list(choices).index(item[answer_key])
+    return None
+
+
+def answer_index(question):
+    """answer_index المحسوب وقت البناء، ولو البنك قديم من غيره بيتحسب من النصوص."""
+    index = question.get("answer_index")
+    return index if index is not None else resolve_answer_index(question)
+
+
+def is_untranslated(text):
+    arabic = len(ARABIC.findall(text))
+    return not arabic or len(LATIN.findall(text)) > arabic
+
+
+def check_question(item, index):
+    """قائمة المشاكل [{"code", "detail"}] لسؤال واحد؛ index = answer_index المحسوب."""
+    issues = []
+    choices = list(item.get("choices") or [])
+    choices_ar = list(item.get("choices_ar") or [])
+
+    if index is None:
+        issues.append({"code": "answer_unresolved", "detail": item.get("answer_ar", item.get("answer"))})
+    if choices and choices_ar and len(choices) != len(choices_ar):
+        issues.append({"code": "choices_length_mismatch", "detail": [len(choices), len(choices_ar)]})
+    if index is not None and "answer_ar" in item:
+        shown = choices_ar[index] if index < len(choices_ar) else None
+        if shown != item["answer_ar"]:
+            issues.append({"code": "answer_mismatch",
+                           "detail": {"answer_ar": item["answer_ar"], "choice": shown}})
+    for key, values in (("choices", choices), ("choices_ar", choices_ar)):
+        empty = [n for n, value in enumerate(values) if not str(value).strip()]
+        if empty:
+            issues.append({"code": "empty_choice", "detail": {key: empty}})
+        duplicated = [value for value, n in Counter(values).items() if n > 1]
+        if duplicated:
+            issues.append({"code": "duplicate_choices", "detail": {key: duplicated}})
+
+    versions = item.get("versions_ar")
+    if versions is not None and not versions:
+        issues.append({"code": "empty_versions", "detail": None})
+    for n, text in enumerate(versions or []):
+        if not str(text).strip():
+            issues.append({"code": "empty_version", "detail": n})
+        elif any(leak in text for leak in PROMPT_LEAKS):
+            issues.append({"code": "prompt_leak", "detail": n})
+        elif is_untranslated(text):
+            issues.append({"code": "untranslated_version", "detail": n})
+    return issues
+
+
+def validate_bank(questions):
+    """يضيف answer_index لكل سؤال (في نفس الـ dicts) ويرجع التقرير."""
+    counts = Counter()
+    items = []
+    for n, item in enumerate(questions):
+        index = resolve_answer_index(item)
+        if index is not None:
+            item["answer_index"] = index
+        issues = check_question(item, index)
+        if issues:
+            counts.update(issue["code"] for issue in issues)
+            items.append({
+                "index": n,
+                "id": item.get("id", n),
+                "question": item.get("question"),
+                "valid": not any(issue["code"] in ERRORS for issue in issues),
+                "issues": issues,
+            })
+    return {
+        "questions": len(questions),
+        "invalid": sum(not entry["valid"] for entry in items),
+        "with_warnings": sum(entry["valid"] for entry in items),
+        "counts": {code: counts[code] for code in ERRORS + WARNINGS if counts[code]},
+        "items": items,
+    }
+
+
+def validated_path(input_file):
+    """enhanced_questions.json → enhanced_questions.validated.json (الملف الأصلي مش بيتغير)."""
+    base, ext = os.path.splitext(input_file)
+    return f"{base}.validated{ext or '.json'}"
+
+
+def build_bank(input_file, output_file=None, report_file=None, drop_invalid=False, pretty=False):
+    questions = load_questions(input_file)
+    report = validate_bank(questions)
+    report["file"] = input_file
+    if drop_invalid:
+        invalid = {entry["index"] for entry in report["items"] if not entry["valid"]}
+        # الـ id الافتراضي هو ترتيب السؤال، فبيتثبت قبل الحذف عشان النتايج القديمة تفضل على نفس السؤال
+        questions = [dict(q, id=q.get("id", n)) for n, q in enumerate(questions) if n not in invalid]
+    write_questions(questions, output_file or validated_path(input_file), pretty=pretty)
+    if report_file:
+        with open(report_file, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="تحديد answer_index وفحص بنك الأسئلة قبل النشر")
+    parser.add_argument("input", nargs="?", default="enhanced_questions.json")
+    parser.add_argument("-o", "--output",
+                        help="البنك بعد إضافة answer_index (افتراضياً <الاسم>.validated.json)")
+    parser.add_argument("--in-place", action="store_true",
+                        help="اكتب على ملف الدخل نفسه (بعد توحيد المفاتيح، وبيتكتب compact إلا مع --pretty)")
+    parser.add_argument("-r", "--report", default="validation_report.json")
+    parser.add_argument("--drop-invalid", action="store_true", help="شيل الأسئلة اللي فيها errors من البنك")
+    parser.add_argument("--pretty", action="store_true")
+    parser.add_argument("--strict", action="store_true", help="exit code 1 لو فيه أسئلة فيها errors")
+    args = parser.parse_args()
+
+    output = args.input if args.in_place else args.output or validated_path(args.input)
+    report = build_bank(args.input, output, args.report,
+                        drop_invalid=args.drop_invalid, pretty=args.pretty)
+    print(f"🔍 {report['questions']} سؤال: {report['invalid']} فيهم errors، "
+          f"{report['with_warnings']} فيهم warnings بس")
+    for code, n in report["counts"].items():
+        print(f"{'❌' if code in ERRORS else '⚠️'} {code}: {n}")
+    print(f"💾 البنك في {output} والتقرير في {args.report}")
+    if args.strict and report["invalid"]:
+        raise SystemExit(1)